@@ -25,6 +25,7 @@ module_names = [
     "properties",
     "panels",
     "operators", 
+    "watch",
 ]
 
 modules = [
@@ -0,0 +1,96 @@
+import bpy
+from . import utils
+
+# Temporary collection the stand-in objects live in while they are exported
+BAKE_COLLECTION_NAME = "BatchExport_Baked"
+
+
+# Objects whose modifiers are worth evaluating once for all formats. Armatures and
+# shape keys are left alone, exporters treat them specially
+def can_bake(obj):
+    if obj.type != 'MESH' or obj.data.shape_keys:
+        return False
+    modifiers = [mod for mod in obj.modifiers if mod.show_viewport]
+    return bool(modifiers) and not any(mod.type == 'ARMATURE' for mod in modifiers)
+
+
+# Formats writing a frame range rather than the current frame, stand-ins baked at the
+# current frame would freeze their animated modifiers
+def exports_animation(file_format, options):
+    if file_format == 'ABC':
+        return options.get("start") is None or options["start"] != options.get("end")
+    if file_format == 'USD':
+        return bool(options.get("export_animation"))
+    return False
+
+
+class BakedObjects(utils.TemporaryObjects):
+    """
+    Stands in for the objects of a job that is exported to several formats, so their
+    modifiers are evaluated once instead of by every exporter.
+
+    Mesh objects with modifiers are replaced by copies holding the evaluated mesh and no
+    modifiers, and the children of replaced objects by copies parented to the stand-ins.
+    The stand-ins take the names of the objects they replace, and everything is removed
+    by cleanup().
+    """
+
+    def __init__(self, context, export_collection=None):
+        super().__init__(context, BAKE_COLLECTION_NAME, export_collection)
+        self.standins = {}  # Source object: stand-in
+        self.meshes = []  # Evaluated meshes
+        self.renamed = []  # (source object, original name)
+
+    def add(self, objects):
+        """
+        Replaces the exported objects that have modifiers by stand-ins.
+
+        Args:
+            objects (list): The objects of the job, selected or in the export collection.
+
+        Returns:
+            list: The objects to export, with the stand-ins in place of the objects they replace.
+        """
+        depsgraph = self.context.evaluated_depsgraph_get()
+        exported = set(objects)
+
+        # Parents first, so children can be parented to their parent's stand-in
+        for obj in sorted(objects, key=lambda obj: utils.get_depth(obj, exported)):
+            parent = self.standins.get(obj.parent)
+            if parent is None and not can_bake(obj):
+                continue
+
+            standin = obj.copy()
+            if can_bake(obj):
+                mesh = bpy.data.meshes.new_from_object(
+                    obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph)
+                self.meshes.append(mesh)
+                standin.data = mesh
+                standin.modifiers.clear()
+            if parent is not None:
+                standin.parent = parent
+
+            name = obj.name
+            self.renamed.append((obj, name))
+            obj.name = name + '_preBake'
+            standin.name = name
+            self.get_collection().objects.link(standin)
+            self.set_exported(obj, False)
+            self.set_exported(standin, True)
+            self.standins[obj] = standin
+
+        return [self.standins.get(obj, obj) for obj in objects]
+
+    # Removes the stand-ins and their meshes, and gives the source objects their names back
+    def cleanup(self):
+        for obj, standin in self.standins.items():
+            bpy.data.objects.remove(standin, do_unlink=True)
+            self.set_exported(obj, True)
+        for mesh in self.meshes:
+            bpy.data.meshes.remove(mesh, do_unlink=True)
+        self.remove_collection()
+        for obj, name in self.renamed:
+            obj.name = name
+        self.standins = {}
+        self.meshes = []
+        self.renamed = []
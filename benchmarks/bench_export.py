@@ -0,0 +1,163 @@
+# Times Batch Export end to end on synthetic scenes, for every mode x limit x format:
+#
+#   blender --background --factory-startup --python benchmarks/bench_export.py -- [options]
+#
+# The scene is generated from the options (object count, collection depth and fan-out,
+# parent chain length, polygons per object, LODs), so runs on different machines or
+# commits are comparable. Results are written as JSON, compare two runs with compare.py.
+import bpy
+import argparse
+import bmesh
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ADDON_DIR)
+from cli import enable_addon  # noqa: E402  Loads the add-on from this checkout if it isn't installed
+
+MODES = ['OBJECTS', 'PARENT_OBJECTS', 'COLLECTIONS', 'COLLECTION_SUBDIRECTORIES',
+         'COLLECTION_SUBDIR_PARENTS', 'SCENE']
+LIMITS = ['VISIBLE', 'SELECTED', 'RENDERABLE']
+FORMATS = ['OBJ', 'PLY', 'STL', 'FBX', 'glTF']
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender --background --factory-startup --python benchmarks/bench_export.py --",
+        description="Benchmark Batch Export on synthetic scenes.",
+    )
+    parser.add_argument("--objects", type=int, default=200, help="Number of objects")
+    parser.add_argument("--depth", type=int, default=2, help="Depth of the collection tree")
+    parser.add_argument("--fanout", type=int, default=3, help="Child collections per collection")
+    parser.add_argument("--parent-chain", type=int, default=1,
+                        help="Length of parent chains, 1 for no parenting")
+    parser.add_argument("--polygons", type=int, default=100, help="Polygons per object")
+    parser.add_argument("--lods", type=int, default=0, help="LODs per object for FBX, 0 for none")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--limits", default=",".join(LIMITS))
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per combination, the fastest is kept")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write the results to")
+    return parser.parse_args(argv)
+
+
+def create_grid_mesh(name, polygons):
+    segments = max(1, int(math.sqrt(polygons)))
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=1.0)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+def build_scene(args):
+    """
+    Replaces the current file with a synthetic scene. Objects are spread over the leaf
+    collections of a tree args.depth deep with args.fanout children per collection.
+    Every args.parent_chain consecutive objects form a parent chain. Every other object
+    is selected and every fourth is hidden in render, so every limit has work to do.
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    scene = bpy.context.scene
+
+    leaves = [scene.collection]
+    for level in range(args.depth):
+        children = []
+        for parent in leaves:
+            for i in range(args.fanout):
+                collection = bpy.data.collections.new(f"{parent.name}_{level}_{i}")
+                parent.children.link(collection)
+                children.append(collection)
+        leaves = children
+
+    base_mesh = create_grid_mesh("BenchMesh", args.polygons)
+    previous = None
+    for i in range(args.objects):
+        obj = bpy.data.objects.new(f"Bench_{i:05d}", base_mesh.copy())
+        leaves[i % len(leaves)].objects.link(obj)
+        obj.location = (i % 100, i // 100, 0)
+        if previous and i % max(1, args.parent_chain):
+            obj.parent = previous
+        previous = obj
+        obj.select_set(i % 2 == 0)
+        obj.hide_render = i % 4 == 3
+    bpy.data.meshes.remove(base_mesh)
+
+
+def count_files(directory):
+    return sum(len(files) for root, dirs, files in os.walk(directory))
+
+
+def time_export(settings, directory, repeat):
+    best = None
+    files = 0
+    for _ in range(max(1, repeat)):
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        start = time.perf_counter()
+        bpy.ops.export_mesh.batch()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        files = count_files(directory)
+    return best, files
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    args = parse_args(argv)
+    build_scene(args)  # Loads factory settings, so enable the add-on afterwards
+    enable_addon()
+
+    results = []
+    settings = bpy.context.scene.batch_export
+    with tempfile.TemporaryDirectory(prefix="batch_export_bench_") as directory:
+        output_dir = os.path.join(directory, "out")
+        settings.directory = output_dir
+        settings.prefix = "bench_"  # Names the SCENE mode's file, the generated file isn't saved
+        settings.full_hierarchy = True
+        settings.object_types = {'MESH'}
+        for file_format in args.formats.split(","):
+            settings.file_format = file_format
+            settings.create_lod = file_format == 'FBX' and args.lods > 0
+            if settings.create_lod:
+                settings.lod_count = min(4, args.lods)
+            for mode in args.modes.split(","):
+                settings.mode = mode
+                for limit in args.limits.split(","):
+                    settings.limit = limit
+                    seconds, files = time_export(settings, output_dir, args.repeat)
+                    results.append({
+                        "format": file_format,
+                        "mode": mode,
+                        "limit": limit,
+                        "seconds": round(seconds, 4),
+                        "files": files,
+                    })
+                    print(f"{file_format:5} {mode:27} {limit:10} {seconds:8.3f}s {files:6} file(s)")
+
+    report = {
+        "blender": bpy.app.version_string,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scene": {
+            "objects": args.objects,
+            "depth": args.depth,
+            "fanout": args.fanout,
+            "parent_chain": args.parent_chain,
+            "polygons": args.polygons,
+            "lods": args.lods,
+        },
+        "results": results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=1)
+    print("Results written to " + os.path.abspath(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Compares the fast STL/PLY writers with the exporter operators on a synthetic scene:
+#
+#   blender --background --factory-startup --python benchmarks/bench_writers.py -- [options]
+#
+# Every object is exported to its own file (Objects mode) with both paths, and the
+# fastest of --repeat runs is kept. Results are written as JSON.
+import bpy
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import bench_export  # noqa: E402
+
+FORMATS = ['STL', 'PLY']
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender --background --factory-startup --python benchmarks/bench_writers.py --",
+        description="Benchmark the fast STL and PLY writers against the exporter operators.",
+    )
+    parser.add_argument("--objects", type=int, default=200, help="Number of objects")
+    parser.add_argument("--polygons", type=int, default=2000, help="Polygons per object")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per combination, the fastest is kept")
+    parser.add_argument("--output", default="bench_writers.json", help="JSON file to write the results to")
+    args = parser.parse_args(argv)
+    # Flat scene, the writers don't care about collections or parents
+    args.depth = 0
+    args.fanout = 1
+    args.parent_chain = 1
+    args.lods = 0
+    return args
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    args = parse_args(argv)
+    bench_export.build_scene(args)  # Loads factory settings, so enable the add-on afterwards
+    bench_export.enable_addon()
+
+    results = []
+    settings = bpy.context.scene.batch_export
+    with tempfile.TemporaryDirectory(prefix="batch_export_bench_") as directory:
+        output_dir = os.path.join(directory, "out")
+        settings.directory = output_dir
+        settings.mode = 'OBJECTS'
+        settings.limit = 'VISIBLE'
+        settings.object_types = {'MESH'}
+        for file_format in FORMATS:
+            settings.file_format = file_format
+            timings = {}
+            for fast_writers in (False, True):
+                settings.fast_writers = fast_writers
+                seconds, files = bench_export.time_export(settings, output_dir, args.repeat)
+                timings[fast_writers] = seconds
+                print(f"{file_format:4} {'fast writer' if fast_writers else 'operator':11} {seconds:8.3f}s {files:6} file(s)")
+            speedup = timings[False] / timings[True] if timings[True] > 0 else 0.0
+            print(f"{file_format:4} speedup {speedup:.1f}x")
+            results.append({
+                "format": file_format,
+                "operator_seconds": round(timings[False], 4),
+                "fast_writer_seconds": round(timings[True], 4),
+                "speedup": round(speedup, 2),
+            })
+
+    report = {
+        "blender": bpy.app.version_string,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scene": {"objects": args.objects, "polygons": args.polygons},
+        "results": results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=1)
+    print("Results written to " + os.path.abspath(args.output))
+
+
+if __name__ == "__main__":
+    main()
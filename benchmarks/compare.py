@@ -0,0 +1,53 @@
+# Compares two benchmark results written by bench_export.py and flags regressions:
+#
+#   python benchmarks/compare.py baseline.json current.json [--threshold 0.1]
+#
+# Exits with code 1 if any combination got slower than the threshold allows.
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path, 'r') as file:
+        report = json.load(file)
+    return report, {(r["format"], r["mode"], r["limit"]): r for r in report["results"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two Batch Export benchmark results.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown flagged as a regression (0.10 = 10%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Ignore differences smaller than this, they're mostly noise")
+    args = parser.parse_args(argv)
+
+    baseline_report, baseline = load_results(args.baseline)
+    current_report, current = load_results(args.current)
+    if baseline_report["scene"] != current_report["scene"]:
+        print("Warning: the runs used different scenes, timings aren't comparable")
+
+    regressions = 0
+    print(f"{'format':6} {'mode':27} {'limit':10} {'baseline':>9} {'current':>9} {'change':>8}")
+    for key in sorted(current):
+        if key not in baseline:
+            continue
+        before = baseline[key]["seconds"]
+        after = current[key]["seconds"]
+        change = (after - before) / before if before > 0 else 0.0
+        flag = ''
+        if change > args.threshold and after - before > args.min_seconds:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif baseline[key]["files"] != current[key]["files"]:
+            flag = f"  file count {baseline[key]['files']} -> {current[key]['files']}"
+        print(f"{key[0]:6} {key[1]:27} {key[2]:10} {before:8.3f}s {after:8.3f}s {change:+7.1%}{flag}")
+
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
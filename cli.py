@@ -0,0 +1,179 @@
+# Command-line entry point for batch exporting many .blend files, e.g. on a build server:
+#
+#   blender --background --python cli.py -- [options] PATH [PATH ...]
+#
+# Every PATH is a .blend file or a directory searched recursively for .blend files.
+# Each file is exported with the Batch Export settings saved in it, optionally
+# overridden from the command line. Run with --help for the list of options.
+#
+# A JSON summary with the result and time of every file is printed, or written to
+# the file given with --summary. Blender exits with code 1 if any file failed.
+import bpy
+import addon_utils
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ADDON_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender --background --python cli.py --",
+        description="Batch export .blend files with their saved Batch Export settings.",
+    )
+    parser.add_argument("paths", nargs='+', metavar="PATH",
+                        help=".blend file, or directory to search for .blend files")
+    parser.add_argument("--directory", help="Override the export directory")
+    parser.add_argument("--format", dest="file_format", help="Override the file format, e.g. FBX or glTF")
+    parser.add_argument("--mode", help="Override the mode, e.g. OBJECTS or COLLECTIONS")
+    parser.add_argument("--limit", help="Override the limit, e.g. VISIBLE or RENDERABLE")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of .blend files to export at once, each in its own Blender process")
+    parser.add_argument("--summary", help="Write the JSON summary to this file instead of printing it")
+    return parser.parse_args(argv)
+
+
+def find_blend_files(paths):
+    blend_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for f in sorted(files):
+                    if f.endswith(".blend"):
+                        blend_files.append(os.path.join(root, f))
+        else:
+            blend_files.append(path)
+    return [os.path.abspath(f) for f in blend_files]
+
+
+# Makes sure the add-on is registered and returns its package name, also used by the benchmarks
+def enable_addon():
+    for module in addon_utils.modules():
+        if os.path.dirname(os.path.realpath(module.__file__)) == ADDON_DIR:
+            addon_utils.enable(module.__name__, default_set=False)
+            return module.__name__
+
+    # Not installed, load it straight from this directory
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    package = os.path.basename(ADDON_DIR)
+    importlib.import_module(package).register()
+    return package
+
+
+# Applies the command-line overrides to the open file's settings
+def apply_overrides(settings, args):
+    if args.directory:
+        settings.directory = os.path.abspath(args.directory)
+    for name in ('file_format', 'mode', 'limit'):
+        value = getattr(args, name)
+        if value:
+            setattr(settings, name, value)
+
+
+# Exports a single .blend file in this Blender process and returns its result
+def export_file(blend_file, args):
+    result = {"blend": blend_file, "exit_code": 0, "file_count": 0, "errors": []}
+    start = time.perf_counter()
+    try:
+        bpy.ops.wm.open_mainfile(filepath=blend_file)
+        apply_overrides(bpy.context.scene.batch_export, args)
+        with tempfile.TemporaryDirectory(prefix="batch_export_") as directory:
+            summary_path = os.path.join(directory, "summary.json")
+            bpy.ops.export_mesh.batch(summary=summary_path)
+            with open(summary_path, 'r') as file:
+                result.update(json.load(file))
+    except Exception as e:
+        result["errors"].append(str(e))
+    if result["errors"]:
+        result["exit_code"] = 1
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+# Builds the command exporting one .blend file in a child Blender process
+def get_child_command(blend_file, args, summary_path):
+    command = [
+        bpy.app.binary_path, "--background",
+        "--python-exit-code", "1",
+        "--python", os.path.realpath(__file__),
+        "--", blend_file, "--summary", summary_path,
+    ]
+    for name in ('directory', 'file_format', 'mode', 'limit'):
+        value = getattr(args, name)
+        if value:
+            option = "--format" if name == 'file_format' else "--" + name
+            command += [option, os.path.abspath(value) if name == 'directory' else value]
+    return command
+
+
+# Exports the .blend files in up to args.jobs child Blender processes at once
+def export_files_concurrently(blend_files, args):
+    # The add-on's process pool, the files are exported by the child processes
+    parallel = importlib.import_module(enable_addon() + ".parallel")
+    results = {}
+    started = {}
+
+    def start(task):
+        blend_file, summary_path = task
+        started[blend_file] = time.perf_counter()
+        command = get_child_command(blend_file, args, summary_path)
+        return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def on_exit(task, process):
+        blend_file, summary_path = task
+        result = {"blend": blend_file, "exit_code": process.returncode,
+                  "file_count": 0, "errors": []}
+        try:
+            with open(summary_path, 'r') as file:
+                result = json.load(file)["files"][0]
+        except (OSError, ValueError, KeyError, IndexError):
+            result["exit_code"] = result["exit_code"] or 1
+            result["errors"].append("Blender exited without writing a summary")
+        result["seconds"] = round(time.perf_counter() - started[blend_file], 3)
+        results[blend_file] = result
+
+    with tempfile.TemporaryDirectory(prefix="batch_export_") as directory:
+        queue = [(blend_file, os.path.join(directory, f"summary_{index}.json"))
+                 for index, blend_file in enumerate(blend_files)]
+        parallel.run_pool(queue, args.jobs, start, on_exit)
+
+    # Keep the order the files were given in
+    return [results[f] for f in blend_files]
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    args = parse_args(argv)
+    args.jobs = max(1, args.jobs)
+    blend_files = find_blend_files(args.paths)
+
+    start = time.perf_counter()
+    if args.jobs > 1 and len(blend_files) > 1:
+        files = export_files_concurrently(blend_files, args)
+    else:
+        enable_addon()
+        files = [export_file(blend_file, args) for blend_file in blend_files]
+
+    summary = {
+        "exit_code": 1 if any(f["exit_code"] for f in files) else 0,
+        "seconds": round(time.perf_counter() - start, 3),
+        "file_count": sum(f["file_count"] for f in files),
+        "files": files,
+    }
+    if args.summary:
+        with open(args.summary, 'w') as file:
+            json.dump(summary, file, indent=1)
+    else:
+        print(json.dumps(summary, indent=1))
+    sys.exit(summary["exit_code"])
+
+
+if __name__ == "__main__":
+    main()
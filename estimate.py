@@ -0,0 +1,159 @@
+import json
+import os
+import statistics
+import time
+from . import manifest
+
+# Timings of previous runs, kept in the export directory
+HISTORY_NAME = ".batch_export_history.json"
+# Runs remembered per format
+HISTORY_LENGTH = 20
+
+# Rough output size per exported triangle, until a run of the format has been timed
+DEFAULT_BYTES_PER_TRIANGLE = {
+    'DAE': 120, 'ABC': 60, 'USD': 60, 'SVG': 100, 'PDF': 100,
+    'OBJ': 70, 'PLY': 30, 'STL': 50, 'FBX': 50, 'glTF': 40,
+}
+
+# A job holding more than this share of all triangles is flagged
+OUTLIER_SHARE = 0.5
+# A job with more than this many times the median triangle count is flagged
+OUTLIER_MEDIAN_FACTOR = 20
+
+
+# Triangles exported per triangle of the source, for the LODs and extra formats of the job
+def get_job_multiplier(job):
+    return (1.0 + sum(job.lod_ratios)) * (1 + len(job.extra_formats))
+
+
+def read_history(base_dir):
+    try:
+        with open(os.path.join(base_dir, HISTORY_NAME), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_run(base_dir, file_format, file_count, triangles, seconds, size):
+    """
+    Adds a finished run to the timing history of its format.
+
+    Args:
+        base_dir (str): The export directory.
+        file_format (str): The run's format.
+        file_count (int): Number of exported files.
+        triangles (float): Exported triangles, including LODs and extra formats.
+        seconds (float): Duration of the whole run.
+        size (int): Total size of the exported files in bytes.
+    """
+    history = read_history(base_dir)
+    runs = history.setdefault(file_format, [])
+    runs.append({
+        "files": file_count,
+        "triangles": triangles,
+        "seconds": seconds,
+        "size": size,
+        "time": time.time(),
+    })
+    del runs[:-HISTORY_LENGTH]
+    with open(os.path.join(base_dir, HISTORY_NAME), 'w') as file:
+        json.dump(history, file, indent=1)
+
+
+def fit_timing(runs):
+    """
+    Fits seconds = per_file * files + per_triangle * triangles to previous runs.
+
+    Returns:
+        tuple: Seconds per file and per triangle, or None without history.
+    """
+    runs = [run for run in runs if run["files"] > 0]
+    if not runs:
+        return None
+    # Least squares over both terms, when the runs differ enough to tell them apart
+    sff = sum(run["files"] ** 2 for run in runs)
+    stt = sum(run["triangles"] ** 2 for run in runs)
+    sft = sum(run["files"] * run["triangles"] for run in runs)
+    sfs = sum(run["files"] * run["seconds"] for run in runs)
+    sts = sum(run["triangles"] * run["seconds"] for run in runs)
+    determinant = sff * stt - sft * sft
+    if determinant > 1e-9 * sff * stt:
+        per_file = (sfs * stt - sts * sft) / determinant
+        per_triangle = (sff * sts - sft * sfs) / determinant
+        if per_file >= 0 and per_triangle >= 0:
+            return per_file, per_triangle
+    # Otherwise spread the time over the files
+    return sum(run["seconds"] for run in runs) / sum(run["files"] for run in runs), 0.0
+
+
+def get_bytes_per_triangle(file_format, runs):
+    triangles = sum(run["triangles"] for run in runs)
+    if triangles > 0:
+        return sum(run["size"] for run in runs) / triangles
+    return DEFAULT_BYTES_PER_TRIANGLE.get(file_format, 50)
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds // 60:.0f}m {seconds % 60:.0f}s"
+    return f"{seconds // 3600:.0f}h {seconds % 3600 // 60:.0f}m"
+
+
+def estimate_plan(context, settings, base_dir, jobs):
+    """
+    Estimates the cost of exporting the jobs, from their triangle counts and the
+    timing history of previous runs of the format in the export directory.
+
+    Returns:
+        tuple: Report lines, one per job followed by the totals, and warning lines
+        flagging jobs that hold an outsized share of the triangles.
+    """
+    depsgraph = context.evaluated_depsgraph_get()
+    runs = read_history(base_dir).get(settings.file_format, [])
+    bytes_per_triangle = get_bytes_per_triangle(settings.file_format, runs)
+
+    lines = []
+    job_triangles = []
+    total_triangles = 0
+    total_work = 0.0
+    file_count = 0
+    for job in jobs:
+        triangles = manifest.count_triangles(job.objects, settings.apply_mods, depsgraph)
+        multiplier = get_job_multiplier(job)
+        job_triangles.append((job, triangles))
+        total_triangles += triangles
+        total_work += triangles * multiplier
+        file_count += 1 + len(job.extra_formats)
+        lines.append(f"{job.filepath}  ({len(job.objects)} object(s), {triangles} triangle(s)"
+                     + (f", x{multiplier:g} for LODs and formats" if multiplier != 1 else "")
+                     + f", ~{format_size(triangles * multiplier * bytes_per_triangle)})")
+
+    timing = fit_timing(runs)
+    total = (f"{file_count} file(s), {total_triangles} triangle(s), "
+             f"~{format_size(total_work * bytes_per_triangle)}")
+    if timing:
+        per_file, per_triangle = timing
+        total += f", estimated {format_duration(per_file * file_count + per_triangle * total_work)}"
+    else:
+        total += f", no timing history for {settings.file_format} in this directory yet"
+    lines.append(total)
+
+    warnings = []
+    if len(job_triangles) > 2 and total_triangles > 0:
+        median = statistics.median(triangles for job, triangles in job_triangles)
+        for job, triangles in job_triangles:
+            share = triangles / total_triangles
+            if share > OUTLIER_SHARE:
+                warnings.append(f"{job.name} holds {share:.0%} of the triangles")
+            elif median > 0 and triangles > OUTLIER_MEDIAN_FACTOR * median:
+                warnings.append(f"{job.name} has {triangles / median:.0f}x the median triangle count")
+    return lines, warnings
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+
+# Event log of the last export run, written to the export directory
+LOG_NAME = ".batch_export_log.jsonl"
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+
+class EventLog:
+    """
+    Structured log of an export run: one event per exported file with its job, path,
+    format, duration, size and warnings, and leveled messages from the helpers.
+    Events are kept in memory and written as JSON Lines in one go at the end of the
+    run. The console only gets every message as it happens when verbose, otherwise
+    just the summary.
+    """
+    enabled = True
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.events = []
+        self.pending_warnings = []  # Warnings of the file being exported
+
+    def log(self, level, message, **fields):
+        event = {"time": time.time(), "level": level, "message": message}
+        event.update(fields)
+        self.events.append(event)
+        if level == 'WARNING':
+            self.pending_warnings.append(message)
+        if self.verbose:
+            print(message if level == 'INFO' else f"{level}: {message}")
+
+    def debug(self, message, **fields):
+        self.log('DEBUG', message, **fields)
+
+    def info(self, message, **fields):
+        self.log('INFO', message, **fields)
+
+    def warning(self, message, **fields):
+        self.log('WARNING', message, **fields)
+
+    def error(self, message, **fields):
+        self.log('ERROR', message, **fields)
+
+    def file(self, job_key, path, file_format, seconds):
+        """
+        Logs an exported file, with the warnings logged while it was exported.
+
+        Args:
+            job_key (str): Key of the job the file belongs to.
+            path (str): Absolute path of the exported file.
+            file_format (str): One of plan.FORMATS.
+            seconds (float): Time it took to export the file.
+        """
+        size = os.path.getsize(path) if os.path.isfile(path) else None
+        warnings, self.pending_warnings = self.pending_warnings, []
+        self.info("exported: " + path, event="file", job=job_key, path=path, format=file_format,
+                  seconds=seconds, size=size, warnings=warnings)
+
+    # Counts files, warnings and errors
+    def get_summary(self):
+        files = sum(1 for event in self.events if event.get("event") == "file")
+        warnings = sum(1 for event in self.events if event["level"] == 'WARNING')
+        errors = sum(1 for event in self.events if event["level"] == 'ERROR')
+        return f"{files} file(s), {warnings} warning(s), {errors} error(s)"
+
+    def write(self, path):
+        with open(path, 'w') as file:
+            file.write("".join(json.dumps(event) + "\n" for event in self.events))
+
+
+# Used outside of export runs, passes warnings and errors on to the console
+class NullEventLog(EventLog):
+    enabled = False
+
+    def log(self, level, message, **fields):
+        if LEVELS[level] >= LEVELS['WARNING']:
+            print(f"{level}: {message}")
+
+
+NULL_LOG = NullEventLog()
+# Log of the running export, for helpers that aren't handed the runner
+current = NULL_LOG
@@ -0,0 +1,226 @@
+import bpy
+import hashlib
+import json
+import os
+from array import array
+from . import eventlog, profiling
+
+# Sidecar file kept in the export directory
+CACHE_NAME = ".batch_export_cache.json"
+
+
+# Turns sets into sorted lists, so values hash the same in every Blender session
+def canonical(value):
+    if isinstance(value, set):
+        return sorted(value)
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    return value
+
+
+# Editable properties that only hold runtime or UI state, they don't change what's exported
+RUNTIME_PROPERTIES = {
+    'tag', 'is_runtime_data', 'use_fake_user', 'use_extra_user',  # IDs
+    'is_active', 'show_expanded', 'is_override_data',  # Modifiers
+}
+
+
+# Returns the simple property values of a Blender struct as a list of (name, value) pairs,
+# pointer properties are represented by the name of the datablock they point to.
+# Read-only properties are left out, they're runtime state such as session_uid and users
+# that changes every time the file is loaded
+def rna_values(struct):
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+            continue
+        if prop.is_readonly or prop.identifier in RUNTIME_PROPERTIES:
+            continue
+        try:
+            value = getattr(struct, prop.identifier)
+        except AttributeError:
+            continue
+        if prop.type == 'POINTER':
+            value = getattr(value, 'name', None)
+        elif getattr(prop, 'is_array', False) or prop.type == 'ENUM' and prop.is_enum_flag:
+            value = sorted(value) if isinstance(value, set) else list(value)
+        values.append((prop.identifier, value))
+    return values
+
+
+def hash_mesh(hasher, mesh):
+    coords = array('f', [0.0]) * (len(mesh.vertices) * 3)
+    mesh.vertices.foreach_get('co', coords)
+    hasher.update(coords.tobytes())
+
+    loops = array('i', [0]) * len(mesh.loops)
+    mesh.loops.foreach_get('vertex_index', loops)
+    hasher.update(loops.tobytes())
+
+    totals = array('i', [0]) * len(mesh.polygons)
+    mesh.polygons.foreach_get('loop_total', totals)
+    hasher.update(totals.tobytes())
+    mesh.polygons.foreach_get('material_index', totals)
+    hasher.update(totals.tobytes())
+
+    for uv_layer in mesh.uv_layers:
+        uvs = array('f', [0.0]) * (len(mesh.loops) * 2)
+        uv_layer.data.foreach_get('uv', uvs)
+        hasher.update(uv_layer.name.encode())
+        hasher.update(uvs.tobytes())
+
+
+def hash_object(hasher, obj):
+    hasher.update(repr((obj.name, obj.type, getattr(obj.parent, 'name', None))).encode())
+    hasher.update(array('f', [v for row in obj.matrix_world for v in row]).tobytes())
+
+    data = obj.data
+    if obj.type == 'MESH':
+        hash_mesh(hasher, data)
+    elif obj.type in ('CURVE', 'SURFACE'):
+        for spline in data.splines:
+            points = spline.bezier_points if spline.type == 'BEZIER' else spline.points
+            coords = array('f', [0.0]) * (len(points) * (3 if spline.type == 'BEZIER' else 4))
+            points.foreach_get('co', coords)
+            hasher.update(coords.tobytes())
+    if data is not None:
+        hasher.update(repr(rna_values(data)).encode())
+
+    for modifier in obj.modifiers:
+        hasher.update(repr(rna_values(modifier)).encode())
+
+    for slot in obj.material_slots:
+        material = slot.material
+        if material is None:
+            continue
+        hasher.update(repr(rna_values(material)).encode())
+        if material.node_tree:
+            for node in material.node_tree.nodes:
+                hasher.update(node.bl_idname.encode())
+                for node_input in node.inputs:
+                    value = getattr(node_input, 'default_value', None)
+                    if value is not None and not isinstance(value, (int, float, str)):
+                        value = list(value)
+                    hasher.update(repr((node_input.identifier, value, node_input.is_linked)).encode())
+
+
+def fingerprint_job(settings, job):
+    """
+    Fingerprints everything that goes into an export job, so unchanged jobs can be skipped.
+
+    Args:
+        settings (BatchExportSettings): The scene's batch export settings.
+        job (plan.ExportJob): The job to fingerprint.
+
+    Returns:
+        str: Hex digest identifying the job's content and settings.
+    """
+    profiling.current.count('fingerprint_job')
+    hasher = hashlib.sha1()
+    # The mode decides which objects get the transform overrides
+    hasher.update(repr((settings.mode, job.filepath, job.operator)).encode())
+    hasher.update(repr(sorted((key, canonical(value)) for key, value in job.options.items())).encode())
+    hasher.update(repr((job.location, job.rotation, job.scale, job.lod_ratios)).encode())
+    for extra_format in job.extra_formats:
+        hasher.update(repr((extra_format.filepath, extra_format.operator)).encode())
+        hasher.update(repr(sorted((key, canonical(value)) for key, value in extra_format.options.items())).encode())
+
+    for obj in sorted(job.objects, key=lambda obj: obj.name):
+        hash_object(hasher, obj)
+    return hasher.hexdigest()
+
+
+def get_file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+        eventlog.current.info("removed: " + path, event="removed", path=path)
+        return True
+    except OSError:
+        return False
+
+
+class ExportCache:
+    """
+    Fingerprints of previously exported jobs, stored in a sidecar file in the export directory.
+    Entries are keyed by format, source type and source name, so the same object can be
+    exported to several formats into the same directory.
+    """
+
+    def __init__(self, base_dir, settings):
+        self.path = os.path.join(base_dir, CACHE_NAME)
+        self.file_format = settings.file_format
+        if settings.mode == 'SCENE':
+            self.source_type = 'SCENE'
+        elif settings.mode == 'COLLECTIONS':
+            self.source_type = 'COLLECTION'
+        else:
+            self.source_type = 'OBJECT'
+        self.removed_count = 0
+        self.entries = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, 'r') as file:
+                    self.entries = json.load(file)
+            except (OSError, ValueError):
+                eventlog.current.warning("Ignoring unreadable export cache " + self.path)
+
+    def entry_key(self, key):
+        return ":".join([self.file_format, self.source_type, key])
+
+    def has_entry(self, key):
+        return self.entry_key(key) in self.entries
+
+    # True if the job was exported before with the same fingerprint and its file is untouched
+    def is_current(self, key, fingerprint):
+        entry = self.entries.get(self.entry_key(key))
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+        return get_file_state(entry["path"]) == entry["state"]
+
+    # True if the entry was exported from the open .blend file, other files may export into the same directory
+    def is_own_entry(self, entry):
+        return entry.get("blend_file") == bpy.data.filepath
+
+    # Remembers an exported file, removing the previous file of the job if its name changed
+    def record(self, key, fingerprint, path):
+        entry_key = self.entry_key(key)
+        entry = self.entries.get(entry_key)
+        if entry and self.is_own_entry(entry) and entry["path"] != path and remove_file(entry["path"]):
+            self.removed_count += 1
+        self.entries[entry_key] = {
+            "fingerprint": fingerprint,
+            "path": path,
+            "state": get_file_state(path),
+            "blend_file": bpy.data.filepath,
+        }
+
+    # Removes files of objects and collections that were deleted or renamed since this .blend file exported them
+    def remove_stale(self):
+        for entry_key, entry in list(self.entries.items()):
+            if not self.is_own_entry(entry):
+                continue
+            source_type, name = entry_key.split(":", 2)[1:]
+            if source_type == 'OBJECT' and name in bpy.data.objects:
+                continue
+            if source_type == 'COLLECTION' and name in bpy.data.collections:
+                continue
+            if source_type == 'SCENE':
+                continue
+            if remove_file(entry["path"]):
+                self.removed_count += 1
+            del self.entries[entry_key]
+
+    def save(self):
+        try:
+            with open(self.path, 'w') as file:
+                json.dump(self.entries, file, indent=1)
+        except OSError as e:
+            eventlog.current.warning(f"Couldn't save export cache {self.path}: {e}")
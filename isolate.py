@@ -0,0 +1,95 @@
+import bpy
+from . import utils
+
+# Temporary scene the objects of each job are exported from
+ISOLATED_SCENE_NAME = "BatchExport_Scene"
+
+
+# Copies the settings exporters read from the scene, e.g. the unit scale and frame rate
+def copy_scene_settings(source, target):
+    for prop in source.unit_settings.bl_rna.properties:
+        if prop.identifier != 'rna_type' and not prop.is_readonly:
+            setattr(target.unit_settings, prop.identifier, getattr(source.unit_settings, prop.identifier))
+    target.render.fps = source.render.fps
+    target.render.fps_base = source.render.fps_base
+    target.frame_start = source.frame_start
+    target.frame_end = source.frame_end
+    target.frame_current = source.frame_current
+
+
+class IsolatedScene:
+    """
+    Temporary scene holding linked duplicates of the objects of one job at a time, so
+    transform overrides, LODs and baked stand-ins are made on the duplicates instead of
+    the user's objects, and the user's scene isn't re-evaluated during the export.
+
+    The duplicates share the objects' data and take their names while they're exported,
+    the names are the only thing changed on the user's objects and are given back by
+    clear(). Run everything that uses the scene inside override().
+    """
+
+    def __init__(self, context):
+        self.scene = bpy.data.scenes.new(ISOLATED_SCENE_NAME)
+        self.view_layer = self.scene.view_layers[0]
+        copy_scene_settings(context.scene, self.scene)
+        self.copies = {}  # Source object: linked duplicate
+        self.renamed = []  # (source object, original name)
+
+    def override(self, context, **members):
+        """
+        Makes the temporary scene the context's scene and view layer.
+
+        Args:
+            context (bpy.types.Context): The context to override.
+            **members: Other context members to override, e.g. selected_objects.
+        """
+        return context.temp_override(scene=self.scene, view_layer=self.view_layer, **members)
+
+    def get_selected_objects(self):
+        return list(self.view_layer.objects.selected)
+
+    def add(self, objects):
+        """
+        Links duplicates of the objects into the temporary scene.
+
+        Args:
+            objects (list): The objects of the job.
+
+        Returns:
+            list: The duplicates, in the same order.
+        """
+        exported = set(objects)
+
+        for obj in sorted(objects, key=lambda obj: utils.get_depth(obj, exported)):
+            copy = obj.copy()  # Shares the mesh and materials
+            if obj.parent in self.copies:
+                copy.parent = self.copies[obj.parent]
+
+            name = obj.name
+            self.renamed.append((obj, name))
+            obj.name = name + '_preExport'
+            copy.name = name
+            self.scene.collection.objects.link(copy)
+            self.copies[obj] = copy
+
+        # Deform and other modifiers follow the duplicates of the objects they point to
+        for copy in self.copies.values():
+            for modifier in copy.modifiers:
+                target = getattr(modifier, 'object', None)
+                if target in self.copies:
+                    modifier.object = self.copies[target]
+
+        return [self.copies[obj] for obj in objects]
+
+    # Removes the duplicates and gives the source objects their names back
+    def clear(self):
+        for copy in self.copies.values():
+            bpy.data.objects.remove(copy, do_unlink=True)
+        for obj, name in self.renamed:
+            obj.name = name
+        self.copies = {}
+        self.renamed = []
+
+    def remove(self):
+        self.clear()
+        bpy.data.scenes.remove(self.scene)
@@ -0,0 +1,184 @@
+import bpy
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.parse import quote
+
+# Journal of the running export, kept in the export directory until the run finishes,
+# one per .blend file so files exporting into the same directory don't share it
+JOURNAL_NAME = ".batch_export_journal-{blend_id}.jsonl"
+# Prefix of the temporary name each file is exported under, next to its final name,
+# followed by the .blend file's id
+STAGING_PREFIX = ".batch_export_partial-"
+
+
+# Identifies the open .blend file in journal and staging names, by its name and a hash of its path
+def get_blend_id():
+    filepath = bpy.data.filepath
+    name = os.path.splitext(os.path.basename(filepath))[0] or "untitled"
+    return f"{name}-{hashlib.sha1(filepath.encode()).hexdigest()[:8]}"
+
+
+class Journal:
+    """
+    Log of an export run, one JSON object per line: the planned jobs, then every
+    completed job as soon as its file is in place. The journal is removed when the
+    run finishes, so one that's left behind belongs to a run that crashed, was
+    cancelled or had errors, and can be resumed by skipping its completed jobs.
+    """
+
+    def __init__(self, base_dir):
+        self.path = os.path.join(base_dir, JOURNAL_NAME.format(blend_id=get_blend_id()))
+        self.file = None
+
+    def read_completed(self):
+        """
+        Reads the jobs completed by the previous, unfinished run.
+
+        Returns:
+            dict: Job key: path of the exported file, empty if there's nothing to resume.
+        """
+        completed = {}
+        try:
+            with open(self.path, 'r') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # Last line cut off by a crash
+                    if entry["event"] == "done":
+                        completed[entry["key"]] = entry["path"]
+        except OSError:
+            return {}
+        return completed
+
+    # Starts the journal of a run, appending to the previous one when resuming it
+    def start(self, jobs, resume=False):
+        self.file = open(self.path, 'a' if resume else 'w')
+        self.write({"event": "plan", "time": time.time(), "jobs": {job.key: job.filepath for job in jobs}})
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def record(self, key, path):
+        self.write({"event": "done", "key": key, "path": path, "time": time.time()})
+
+    # Closes the journal, removing it if the run finished so there's nothing to resume
+    def close(self, finished):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if finished:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+# Exported text files that refer to their sidecar files by name, e.g. OBJ's mtllib line
+# and the buffer uri of a .gltf with a separate .bin
+REFERENCING_EXTENSIONS = ('.obj', '.gltf')
+
+
+# Files the exporter wrote next to the staged file and named after it, e.g. its .mtl or .bin
+def get_staged_sidecars(staged_path):
+    directory, staged_name = os.path.split(staged_path)
+    staged_root = os.path.splitext(staged_name)[0] + "."
+    return [name for name in os.listdir(directory) if name.startswith(staged_root) and name != staged_name]
+
+
+def rewrite_references(path, replacements):
+    """
+    Replaces sidecar file names in an exported text file. Only the lines up to the
+    last reference are rewritten, the rest of the file is copied as it is.
+
+    Args:
+        path (str): The file to rewrite, in place.
+        replacements (dict): Old name: new name, both as they're written in the file.
+    """
+    replacements = {old.encode(): new.encode() for old, new in replacements.items()}
+    remaining = set(replacements)
+    rewritten_path = path + ".rewrite"
+    try:
+        with open(path, 'rb') as source, open(rewritten_path, 'wb') as target:
+            for line in source:
+                for old in [old for old in remaining if old in line]:
+                    line = line.replace(old, replacements[old])
+                    remaining.discard(old)
+                target.write(line)
+                if not remaining:
+                    break
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(rewritten_path, path)
+    finally:
+        if os.path.exists(rewritten_path):
+            os.remove(rewritten_path)
+
+
+@contextmanager
+def staged_file(filepath):
+    """
+    Lets an exporter write under a temporary name next to the file and renames the
+    result only when the export succeeded, so an error or crash never leaves a
+    half-written file under its final name. The exporter writes to the final
+    directory, so relative paths it computes (e.g. to textures) stay correct.
+    Sidecar files named after the staged file (e.g. .mtl, .bin) are renamed along
+    with it, and the references to them rewritten.
+
+    Args:
+        filepath (str): The final path of the exported file.
+
+    Yields:
+        str: The path the exporter should write to.
+    """
+    directory, name = os.path.split(filepath)
+    root = os.path.splitext(name)[0]
+    # Keep the extension last, exporters check it
+    staged_name = f"{STAGING_PREFIX}{get_blend_id()}-{uuid.uuid4().hex[:12]}-{name}"
+    staged_path = os.path.join(directory, staged_name)
+    staged_root = os.path.splitext(staged_name)[0]
+    try:
+        yield staged_path
+        if os.path.isfile(staged_path):
+            sidecars = get_staged_sidecars(staged_path)
+            if sidecars and os.path.splitext(name)[1].lower() in REFERENCING_EXTENSIONS:
+                replacements = {}
+                for sidecar in sidecars:
+                    final_sidecar = root + sidecar[len(staged_root):]
+                    replacements[sidecar] = final_sidecar
+                    replacements[quote(sidecar)] = quote(final_sidecar)  # glTF uris are URL encoded
+                rewrite_references(staged_path, replacements)
+            # The exported file goes last, so it only appears once its sidecar files are there
+            for sidecar in sidecars:
+                os.replace(os.path.join(directory, sidecar), os.path.join(directory, root + sidecar[len(staged_root):]))
+            os.replace(staged_path, filepath)
+    finally:
+        for leftover in [staged_name] + get_staged_sidecars(staged_path):
+            try:
+                os.remove(os.path.join(directory, leftover))
+            except OSError:
+                pass
+
+
+# Removes what exporters wrote for this .blend file before Blender crashed or was
+# killed halfway through, files staged by other .blend files may still be in use
+def remove_staging_leftovers(directories):
+    prefix = f"{STAGING_PREFIX}{get_blend_id()}-"
+    for directory in directories:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
@@ -0,0 +1,298 @@
+import bpy
+import hashlib
+import os
+import tempfile
+from array import array
+from . import eventlog, incremental, utils
+
+# Temporary collection the LOD objects live in while they are exported
+LOD_COLLECTION_NAME = "BatchExport_LODs"
+
+# Decimated meshes are kept here between runs, one .blend file per mesh
+LOD_CACHE_DIR = os.path.join(tempfile.gettempdir(), "batch_export_lod_cache")
+# Bump when the decimation or the mesh hash changes, so older cached meshes are not reused
+LOD_CACHE_VERSION = 2
+
+# foreach_get property, array type code and values per element of each attribute type
+ATTRIBUTE_LAYOUTS = {
+    'FLOAT': ('value', 'f', 1),
+    'INT': ('value', 'i', 1),
+    'INT8': ('value', 'i', 1),
+    'BOOLEAN': ('value', 'b', 1),
+    'FLOAT2': ('vector', 'f', 2),
+    'INT32_2D': ('value', 'i', 2),
+    'FLOAT_VECTOR': ('vector', 'f', 3),
+    'FLOAT_COLOR': ('color', 'f', 4),
+    'BYTE_COLOR': ('color', 'f', 4),
+    'QUATERNION': ('value', 'f', 4),
+    'FLOAT4X4': ('value', 'f', 16),
+}
+# Internal attributes holding editing state only
+IGNORED_ATTRIBUTE_PREFIXES = ('.select', '.hide')
+
+
+# Hashes everything the decimated mesh carries over besides what incremental.hash_mesh
+# covers: every attribute (colors, creases, UVs, custom ones), custom normals, seams
+# and vertex group weights
+def hash_mesh_data(hasher, mesh):
+    for attribute in sorted(mesh.attributes, key=lambda attribute: attribute.name):
+        if attribute.name.startswith(IGNORED_ATTRIBUTE_PREFIXES) or attribute.data_type not in ATTRIBUTE_LAYOUTS:
+            continue
+        prop, typecode, size = ATTRIBUTE_LAYOUTS[attribute.data_type]
+        values = array(typecode, [0]) * (len(attribute.data) * size)
+        attribute.data.foreach_get(prop, values)
+        hasher.update(repr((attribute.name, attribute.domain, attribute.data_type)).encode())
+        hasher.update(values.tobytes())
+
+    if mesh.has_custom_normals:
+        normals = array('f', [0.0]) * (len(mesh.loops) * 3)
+        mesh.corner_normals.foreach_get('vector', normals)
+        hasher.update(normals.tobytes())
+
+    seams = array('b', [0]) * len(mesh.edges)
+    mesh.edges.foreach_get('use_seam', seams)
+    hasher.update(seams.tobytes())
+
+    # Weights aren't attributes, they can only be read per vertex
+    for vertex in mesh.vertices:
+        if vertex.groups:
+            hasher.update(repr((vertex.index, [(group.group, group.weight) for group in vertex.groups])).encode())
+
+
+class LodCache:
+    """
+    On-disk cache of decimated LOD meshes, keyed by a hash of the mesh they were
+    decimated from and the chain of ratios applied to it. Materials aren't stored,
+    the cached mesh gets the source mesh's materials when it's loaded.
+    When the cache grows past max_size MB, the least recently used meshes are removed.
+    """
+
+    def __init__(self, directory=LOD_CACHE_DIR, max_size=512):
+        self.directory = directory
+        self.max_size = max_size * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get_mesh_hash(self, mesh):
+        hasher = hashlib.sha1(repr(("lod", LOD_CACHE_VERSION)).encode())
+        incremental.hash_mesh(hasher, mesh)
+        hash_mesh_data(hasher, mesh)
+        return hasher.hexdigest()
+
+    def get_path(self, mesh_hash, chain):
+        key = hashlib.sha1(repr((mesh_hash, chain)).encode()).hexdigest()
+        return os.path.join(self.directory, key + ".blend")
+
+    def load(self, path, materials):
+        """
+        Appends a cached mesh to the current file.
+
+        Args:
+            path (str): The cache file, from get_path().
+            materials (list): Materials to assign to the mesh's slots.
+
+        Returns:
+            bpy.types.Mesh: The mesh, or None on a cache miss.
+        """
+        if not os.path.isfile(path):
+            self.misses += 1
+            return None
+        try:
+            with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+                data_to.meshes = data_from.meshes[:1]
+        except (OSError, RuntimeError):
+            self.misses += 1
+            os.remove(path)
+            return None
+        for library in bpy.data.libraries:
+            if os.path.normpath(bpy.path.abspath(library.filepath)) == os.path.normpath(path):
+                bpy.data.libraries.remove(library)
+        if not data_to.meshes or data_to.meshes[0] is None:
+            self.misses += 1
+            return None
+
+        mesh = data_to.meshes[0]
+        mesh.use_fake_user = False
+        for i, material in enumerate(materials[:len(mesh.materials)]):
+            mesh.materials[i] = material
+        os.utime(path)  # Marks it as recently used for eviction
+        self.hits += 1
+        return mesh
+
+    def save(self, path, mesh):
+        # Empty the slots (keeping the material indices), so materials aren't written along
+        materials = list(mesh.materials)
+        for i in range(len(materials)):
+            mesh.materials[i] = None
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            bpy.data.libraries.write(temp_path, {mesh}, fake_user=True)
+            os.replace(temp_path, path)
+        except OSError as e:
+            eventlog.current.warning(f"Couldn't write LOD cache {path}: {e}")
+        finally:
+            for i, material in enumerate(materials):
+                mesh.materials[i] = material
+
+    # Removes the least recently used meshes until the cache fits in max_size
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".blend"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class LodBuilder(utils.TemporaryObjects):
+    """
+    Builds FBX LodGroups for the meshes of an export job.
+
+    Each LOD level is decimated from the closest finer level rather than from the full
+    resolution mesh, and stored as plain mesh data without modifiers, so the exporter
+    doesn't have to evaluate any decimation. The builder is used inside the run's temporary
+    scene (isolate.IsolatedScene), where the temporary objects are kept in their own
+    collection, and everything is removed by cleanup().
+    """
+
+    def __init__(self, context, cache=None, export_collection=None):
+        super().__init__(context, LOD_COLLECTION_NAME, export_collection)
+        self.cache = cache
+        self.objects = []  # Temporary objects
+        self.meshes = []  # Temporary mesh datablocks
+        self.renamed = []  # (source object, original name)
+
+    def new_mesh_from_object(self, obj):
+        depsgraph = self.context.evaluated_depsgraph_get()
+        mesh = bpy.data.meshes.new_from_object(
+            obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph)
+        self.meshes.append(mesh)
+        return mesh
+
+    # Returns a new mesh with the faces of the given mesh decimated by ratio
+    def decimate(self, mesh, ratio):
+        decimator = bpy.data.objects.new("BatchExport_Decimate", mesh)
+        self.get_collection().objects.link(decimator)
+        decimate_mod = decimator.modifiers.new('lodding', type='DECIMATE')
+        decimate_mod.ratio = ratio
+        try:
+            return self.new_mesh_from_object(decimator)
+        finally:
+            bpy.data.objects.remove(decimator, do_unlink=True)
+
+    # Same as decimate(), going through the cache when there is one
+    def get_decimated(self, mesh, ratio, mesh_hash, chain):
+        if self.cache is None:
+            return self.decimate(mesh, ratio)
+        path = self.cache.get_path(mesh_hash, chain)
+        decimated = self.cache.load(path, list(mesh.materials))
+        if decimated is not None:
+            self.meshes.append(decimated)
+            return decimated
+        decimated = self.decimate(mesh, ratio)
+        self.cache.save(path, decimated)
+        return decimated
+
+    def new_object(self, name, data, parent):
+        lod = bpy.data.objects.new(name, data)
+        self.get_collection().objects.link(lod)
+        lod.parent = parent
+        self.objects.append(lod)
+        self.set_exported(lod, True)
+        return lod
+
+    # Evaluates the object's mesh without its armature deformation, so the LODs can be skinned
+    def new_rest_mesh_from_object(self, obj, armatures):
+        for modifier in armatures:
+            modifier.show_viewport = False
+        try:
+            return self.new_mesh_from_object(obj)
+        finally:
+            for modifier in armatures:
+                modifier.show_viewport = True
+
+    # Gives a LOD object the source object's vertex groups and armature modifiers
+    def add_skinning(self, lod, obj, armatures):
+        for group in obj.vertex_groups:
+            lod.vertex_groups.new(name=group.name)
+        for modifier in armatures:
+            lod_modifier = lod.modifiers.new(modifier.name, 'ARMATURE')
+            for prop in modifier.bl_rna.properties:
+                if not prop.is_readonly and prop.identifier not in ('name', 'rna_type'):
+                    setattr(lod_modifier, prop.identifier, getattr(modifier, prop.identifier))
+
+    def add(self, obj, ratios):
+        """
+        Replaces a mesh object in the export by a LodGroup empty with the object's
+        name, parenting a LOD0 with the evaluated mesh and one object per ratio.
+
+        Args:
+            obj (bpy.types.Object): The exported mesh object.
+            ratios (list): Decimate ratio of each LOD level relative to LOD0.
+        """
+        name = obj.name
+        self.renamed.append((obj, name))
+        obj.name = name + '_preLOD'
+        self.set_exported(obj, False)
+
+        # Setup LOD parent object
+        lodParent = self.new_object(name, None, obj.parent)
+        lodParent.location = obj.location
+        lodParent.rotation_quaternion = obj.rotation_quaternion
+        lodParent["fbx_type"] = "LodGroup"
+
+        # Armature deformation stays a modifier on the LODs, like bake.can_bake leaves
+        # armatures alone, so rigged meshes keep their skinning
+        armatures = [modifier for modifier in obj.modifiers if modifier.type == 'ARMATURE' and modifier.show_viewport]
+
+        # Each level is decimated from the closest finer level, so the decimation of
+        # every level only works through the faces left by the previous ones
+        # Levels are (ratio, mesh, chain of relative ratios that led from LOD0 to the mesh)
+        levels = [(1.0, self.new_rest_mesh_from_object(obj, armatures), ())]
+        mesh_hash = self.cache.get_mesh_hash(levels[0][1]) if self.cache else None
+        for ratio in ratios:
+            source_ratio, source_mesh, chain = min(
+                (level for level in levels if level[0] >= ratio), key=lambda level: level[0])
+            relative = ratio / source_ratio if source_ratio > 0 else 0.0
+            if relative >= 1.0:
+                levels.append((ratio, source_mesh, chain))
+                continue
+            chain = chain + (round(relative, 6),)
+            levels.append((ratio, self.get_decimated(source_mesh, relative, mesh_hash, chain), chain))
+
+        for lodcount, (ratio, mesh, chain) in enumerate(levels):
+            lod = self.new_object(name + f"_LOD{lodcount}", mesh, lodParent)
+            lod.rotation_mode = obj.rotation_mode
+            lod.rotation_euler = obj.rotation_euler
+            lod.rotation_quaternion = obj.rotation_quaternion
+            lod.scale = obj.scale
+            if armatures:
+                self.add_skinning(lod, obj, armatures)
+
+            # Materials linked to the object rather than its mesh
+            for slot, lod_slot in zip(obj.material_slots, lod.material_slots):
+                if slot.link == 'OBJECT':
+                    lod_slot.link = 'OBJECT'
+                    lod_slot.material = slot.material
+
+    # Removes every temporary object, mesh and the collection, and gives the source objects their names back
+    def cleanup(self):
+        for lod in self.objects:
+            bpy.data.objects.remove(lod, do_unlink=True)
+        for mesh in self.meshes:
+            bpy.data.meshes.remove(mesh, do_unlink=True)
+        self.remove_collection()
+        for obj, name in self.renamed:
+            obj.name = name
+        self.objects = []
+        self.meshes = []
+        self.renamed = []
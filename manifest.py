@@ -0,0 +1,97 @@
+import bpy
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# SQLite database in the export directory listing every exported file
+MANIFEST_NAME = ".batch_export_manifest.sqlite"
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS exports (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL,
+        source TEXT NOT NULL,
+        objects TEXT NOT NULL,
+        format TEXT NOT NULL,
+        size INTEGER,
+        sha256 TEXT,
+        triangles INTEGER,
+        seconds REAL,
+        timestamp REAL NOT NULL,
+        blend_file TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS exports_path ON exports (path)",
+    # The last export of every file
+    """CREATE VIEW IF NOT EXISTS latest AS
+        SELECT * FROM exports WHERE id IN (SELECT MAX(id) FROM exports GROUP BY path)""",
+]
+
+
+def hash_file(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# Counts the triangles of the mesh objects, as they are exported
+def count_triangles(objects, apply_mods, depsgraph=None):
+    depsgraph = depsgraph or bpy.context.evaluated_depsgraph_get()
+    triangles = 0
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        mesh = obj.evaluated_get(depsgraph).data if apply_mods else obj.data
+        # A polygon with n corners is n - 2 triangles
+        triangles += len(mesh.loops) - 2 * len(mesh.polygons)
+    return triangles
+
+
+class Manifest:
+    """
+    History of every file written to an export directory, in an SQLite database so
+    downstream tools can query it, e.g. the latest content hash of every file:
+
+        SELECT path, sha256 FROM latest
+
+    A row is added as soon as each file is in place. Paths are relative to the
+    export directory.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, MANIFEST_NAME)
+        # Parallel workers write to the same database, wait for each other's writes
+        self.connection = sqlite3.connect(self.path, timeout=60)
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def record(self, filepath, source, objects, file_format, triangles, seconds):
+        """
+        Adds an exported file to the manifest.
+
+        Args:
+            filepath (str): Absolute path of the exported file.
+            source (str): Name of the object or collection the file was exported from.
+            objects (list): The exported objects.
+            file_format (str): One of plan.FORMATS.
+            triangles (int): Number of triangles in the file.
+            seconds (float): Time it took to export the file.
+        """
+        size = sha256 = None
+        if os.path.isfile(filepath):
+            size = os.path.getsize(filepath)
+            sha256 = hash_file(filepath)
+        self.connection.execute(
+            "INSERT INTO exports (path, source, objects, format, size, sha256, triangles, seconds, timestamp, blend_file)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.relpath(filepath, self.base_dir), source, json.dumps(sorted(obj.name for obj in objects)),
+             file_format, size, sha256, triangles, seconds, time.time(), bpy.data.filepath))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -1,433 +1,754 @@
 import bpy
+import json
 import os
+import sqlite3
+import time
 from bpy.types import Operator
-from . import utils
-
-# Operator called when pressing the batch export button.
-class EXPORT_MESH_OT_batch(Operator):
-    """Export many objects to seperate files all at once"""
-    bl_idname = "export_mesh.batch"
-    bl_label = "Batch Export"
+from bpy.props import BoolProperty, StringProperty
+from . import bake, estimate, eventlog, incremental, isolate, journal, lod, manifest, parallel, plan, profiling, utils, watch, writers
+
+# Runs an export plan in three steps, so it can be driven all at once by an
+# operator's execute() or one job at a time by a modal operator:
+# begin_run() saves the user's state and compiles the plan, run_job() exports
+# a single job and end_run() restores the user's state and reports the results.
+class BatchExportRunner:
     file_count = 0
 
-    def execute(self, context):
+    def begin_run(self, context, use_cache=True, changes=None):
         settings = context.scene.batch_export
+        self.run_start = time.perf_counter()
+        self.main_run = use_cache  # False in parallel workers
+        self.watching = changes is not None
+        self.file_count = 0
+        self.errors = []
+        self.exported = {}  # job key: path of the exported file
+        self.jobs = []
+        self.cache = None
+        self.skipped_count = 0
+        self.resumed_count = 0
+        self.journal = None
+        self.manifest = None
+        self.lod_cache = None
+        self.export_collection = None
+        self.isolated = None
+        self.isolate_all = settings.isolate
+        self.in_isolated_scene = False  # True while a job is exported from the temporary scene
+        self.select_objects = True
+        self.fast_writers = settings.fast_writers
+        self.memory_budget = settings.memory_budget * 1024 * 1024
+        self.peak_memory = 0
+        self.profiler = profiling.Profiler() if settings.profile else profiling.NULL_PROFILER
+        profiling.current = self.profiler
+        self.log = eventlog.EventLog(verbose=settings.verbose)
+        eventlog.current = self.log
 
         # Set Base Directory
-        base_dir = settings.directory
-        if not bpy.data.is_saved:  # Then the blend file hasn't been saved
-            # Then the path should be relative
-            if base_dir != bpy.path.abspath(base_dir):
-                self.report(
-                    {'ERROR'}, "Save .blend file somewhere before exporting to relative directory\n(or use an absolute directory)")
-                return {'FINISHED'}
-        base_dir = bpy.path.abspath(base_dir)  # convert to absolute path
-        if not os.path.isdir(base_dir):
-            self.report({'ERROR'}, "Export directory doesn't exist")
-            return {'FINISHED'}
-
-        self.file_count = 0
+        base_dir, error = plan.get_base_dir(settings)
+        if error:
+            self.errors.append(error)
+            self.report({'ERROR'}, error)
+            profiling.current = profiling.NULL_PROFILER
+            eventlog.current = eventlog.NULL_LOG
+            return False
+        self.base_dir = base_dir
+
+        # Keep watch mode from recording the changes the export makes to the scene
+        self.was_watch_exporting = watch.exporting
+        watch.exporting = True
 
         # Save current state of viewlayer, selection and active object to restore after export
-        view_layer = context.view_layer
-        selection = context.selected_objects
-        obj_active = view_layer.objects.active   
+        self.view_layer = context.view_layer
+        self.selection = context.selected_objects
+
+        self.frame_current = context.scene.frame_current
 
         # Check if we're not in Object mode and set if needed
-        obj_active = view_layer.objects.active        
-        mode = ''
-        if obj_active:
-            mode = obj_active.mode
+        self.obj_active = self.view_layer.objects.active        
+        self.mode = ''
+        if self.obj_active:
+            self.mode = self.obj_active.mode
             bpy.ops.object.mode_set(mode='OBJECT')  # Only works in Object mode
-        
-
-        ##### EXPORT OBJECTS BASED ON MODES #####
-
-        if settings.mode == 'OBJECTS':
-            for obj in self.get_filtered_objects(context, settings):
 
-                # Export Selection
+        with self.profiler.phase('plan'):
+            self.jobs = plan.compile_plan(context, settings, base_dir)
+
+        if settings.lod_cache and any(job.lod_ratios for job in self.jobs):
+            try:
+                self.lod_cache = lod.LodCache(max_size=settings.lod_cache_size)
+            except OSError as e:
+                self.errors.append(f"LOD cache disabled: {e}")
+
+        # Leave out jobs that haven't changed since they were last exported,
+        # animated frames can't be fingerprinted without evaluating them
+        if self.watching:
+            with self.profiler.phase('fingerprint'):
+                self.skip_unchanged_jobs(settings, base_dir, changes)
+        elif settings.incremental and use_cache and not plan.uses_frame_sequence(settings):
+            with self.profiler.phase('fingerprint'):
+                self.skip_unchanged_jobs(settings, base_dir)
+
+        if settings.manifest:
+            try:
+                self.manifest = manifest.Manifest(base_dir)
+                self.manifest_apply_mods = settings.apply_mods
+            except sqlite3.Error as e:
+                self.errors.append(f"Couldn't open export manifest in {base_dir}: {e}")
+
+        # Keep a journal of the run so it can be resumed, workers are journaled by the main process
+        if use_cache:
+            self.start_journal(settings, base_dir)
+
+        # Jobs are exported from duplicates in a temporary scene, leaving the user's scene alone.
+        # Jobs with LODs always are, so the LODs are built off the user's scene
+        if settings.isolate or any(job.lod_ratios for job in self.jobs):
+            self.isolated = isolate.IsolatedScene(context)
+
+        # Jobs select the objects they export, so start from an empty selection,
+        # unless all of them hand their objects over in a collection
+        self.select_objects = any("collection" not in job.options and not self.is_isolated(job) for job in self.jobs)
+        if self.select_objects:
+            for obj in context.selected_objects:
+                obj.select_set(False)
+        if any("collection" in job.options for job in self.jobs):
+            self.export_collection = bpy.data.collections.new(plan.EXPORT_COLLECTION_NAME)
+        return True
+
+    def start_journal(self, settings, base_dir):
+        self.journal = journal.Journal(base_dir)
+        if settings.resume:
+            # Skip the jobs the unfinished run completed, as long as their files are still there
+            completed = self.journal.read_completed()
+            remaining_jobs = [job for job in self.jobs
+                              if completed.get(job.key) != job.filepath or not os.path.isfile(job.filepath)]
+            self.resumed_count = len(self.jobs) - len(remaining_jobs)
+            self.jobs = remaining_jobs
+        journal.remove_staging_leftovers(plan.get_directories(self.jobs))
+        try:
+            self.journal.start(self.jobs, resume=settings.resume)
+        except OSError as e:
+            self.errors.append(f"Couldn't write export journal {self.journal.path}: {e}")
+            self.journal = None
+
+    # With watch mode changes, only the jobs they touch and jobs that were never
+    # exported (e.g. renamed objects) are fingerprinted, the rest count as unchanged
+    def skip_unchanged_jobs(self, settings, base_dir, changes=None):
+        self.cache = incremental.ExportCache(base_dir, settings)
+        self.cache.remove_stale()
+        self.fingerprints = {}
+        changed_jobs = []
+        for job in self.jobs:
+            if changes is not None and self.cache.has_entry(job.key) and not watch.is_touched(job, changes):
+                self.skipped_count += 1
+                continue
+            self.fingerprints[job.key] = incremental.fingerprint_job(settings, job)
+            if settings.incremental and self.cache.is_current(job.key, self.fingerprints[job.key]):
+                self.skipped_count += 1
+            else:
+                changed_jobs.append(job)
+        self.jobs = changed_jobs
+
+    # Samples the memory this process uses, keeping track of the peak
+    def sample_memory(self):
+        memory = utils.get_process_memory()
+        self.peak_memory = max(self.peak_memory, memory)
+        return memory
+
+    # Checked before each job, so a large run stops with an error instead of exhausting RAM
+    def over_memory_budget(self):
+        memory = self.sample_memory()
+        if not self.memory_budget or memory <= self.memory_budget:
+            return False
+        self.errors.append(
+            f"Stopped after {self.file_count} file(s): using {memory / 1024 / 1024:.0f} MB, "
+            f"over the memory budget of {self.memory_budget / 1024 / 1024:.0f} MB")
+        return True
+
+    def run_job(self, context, job):
+        self.profiler.begin_job(job)
+        try:
+            path = self.export_job(context, job)
+        finally:
+            self.profiler.end_job()
+        if path:
+            self.exported[job.key] = path
+            if self.journal:
+                self.journal.record(job.key, path)
+
+    def end_run(self, context, cancelled=False):
+        if self.journal:
+            self.journal.close(finished=not cancelled and not self.errors)
+        if self.manifest:
+            self.manifest.close()
+        if self.cache:
+            for key, path in self.exported.items():
+                self.cache.record(key, self.fingerprints[key], path)
+            self.cache.save()
+        if self.lod_cache:
+            self.lod_cache.evict()
+
+        if self.export_collection:
+            bpy.data.collections.remove(self.export_collection)
+            self.export_collection = None
+        if self.isolated:
+            self.isolated.remove()
+            self.isolated = None
+
+        with self.profiler.phase('restore_selection'):
+            # Return selection to how it was
+            if self.select_objects:
+                bpy.ops.object.select_all(action='DESELECT')
+                for obj in self.selection:
+                    obj.select_set(True)
+            self.view_layer.objects.active = self.obj_active
+
+            # Return to whatever mode the user was in
+            if self.obj_active:
+                bpy.ops.object.mode_set(mode=self.mode)
+
+        # Return to the frame the user was on after a frame sequence
+        if context.scene.frame_current != self.frame_current:
+            context.scene.frame_set(self.frame_current)
+
+        # Evaluate the changes made by the export now, while watch mode ignores them
+        context.evaluated_depsgraph_get()
+        watch.exporting = self.was_watch_exporting
+
+        # Workers hand their profile to the main process, which writes the report
+        if self.profiler.enabled and self.main_run:
+            profile_path = os.path.join(self.base_dir, profiling.PROFILE_NAME)
+            try:
+                self.profiler.write(profile_path)
+            except OSError as e:
+                self.errors.append(f"Couldn't write profile {profile_path}: {e}")
+            for line in self.profiler.get_summary():
+                self.report({'INFO'}, line)
+        profiling.current = profiling.NULL_PROFILER
+
+        if self.main_run and self.file_count:
+            self.save_timing_history(context)
+        self.write_log()
+
+        for error in self.errors:
+            self.report({'ERROR'}, error)
+        if cancelled:
+            file_total = sum(1 + len(job.extra_formats) for job in self.jobs)
+            self.report({'WARNING'}, f"Cancelled after exporting {self.file_count} of {file_total} file(s)")
+        elif self.cache:
+            self.report({'INFO'}, f"Exported {self.file_count} file(s), skipped {self.skipped_count} unchanged, removed {self.cache.removed_count}")
+        elif self.file_count == 0 and not self.resumed_count and not self.watching:
+            self.report({'ERROR'}, "NOTHING TO EXPORT")
+        else:
+            self.report({'INFO'}, "Exported " +
+                        str(self.file_count) + " file(s)")
+        if self.resumed_count:
+            self.report({'INFO'}, f"Resumed, skipped {self.resumed_count} file(s) exported before")
+        self.report({'INFO'}, f"Peak memory: {self.peak_memory / 1024 / 1024:.0f} MB")
+        if self.lod_cache:
+            self.report({'INFO'}, f"LOD cache: {self.lod_cache.hits} hit(s), {self.lod_cache.misses} miss(es)")
+
+    # Writes the events of the run (workers hand theirs to the main process) and prints its summary
+    def write_log(self):
+        eventlog.current = eventlog.NULL_LOG
+        for error in self.errors:
+            self.log.error(error)
+        if not self.main_run:
+            return
+        log_path = os.path.join(self.base_dir, eventlog.LOG_NAME)
+        try:
+            self.log.write(log_path)
+            print(f"Batch Export: {self.log.get_summary()}, log written to {log_path}")
+        except OSError as e:
+            self.errors.append(f"Couldn't write export log {log_path}: {e}")
+
+    # Remembers how long the run took for its triangle count, to estimate later runs
+    def save_timing_history(self, context):
+        settings = context.scene.batch_export
+        depsgraph = context.evaluated_depsgraph_get()
+        triangles = 0.0
+        size = 0
+        for job in self.jobs:
+            if job.key not in self.exported:
+                continue
+            job_triangles = manifest.count_triangles(job.objects, settings.apply_mods, depsgraph)
+            triangles += job_triangles * estimate.get_job_multiplier(job)
+            for path in [job.filepath] + [extra_format.filepath for extra_format in job.extra_formats]:
+                if os.path.isfile(path):
+                    size += os.path.getsize(path)
+        try:
+            estimate.save_run(self.base_dir, settings.file_format, self.file_count, triangles,
+                              time.perf_counter() - self.run_start, size)
+        except OSError as e:
+            self.errors.append(f"Couldn't save timing history: {e}")
+
+    # Writes the results of the run as JSON, read by the command-line entry point
+    def write_summary(self, path):
+        summary = {
+            "file_count": self.file_count,
+            "skipped_count": self.skipped_count,
+            "resumed_count": self.resumed_count,
+            "removed_count": self.cache.removed_count if self.cache else 0,
+            "errors": self.errors,
+            "exported": self.exported,
+            "lod_cache": self.get_lod_cache_counts(),
+            "peak_memory": self.peak_memory,
+        }
+        with open(path, 'w') as file:
+            json.dump(summary, file, indent=1)
+
+    def get_lod_cache_counts(self):
+        if not self.lod_cache:
+            return {"hits": 0, "misses": 0}
+        return {"hits": self.lod_cache.hits, "misses": self.lod_cache.misses}
+
+    # create the directories the jobs export to, once per distinct directory
+    def make_directories(self, jobs):
+        for directory in plan.get_directories(jobs):
+            if not os.path.exists(directory):
+                try:
+                    os.makedirs(directory)
+                    self.log.info(f"Directory created: {directory}", directory=directory)
+                except OSError as e:
+                    self.report({'ERROR'}, f"Error creating directory {directory}: {e}")
+
+    # Selects the job's objects, exports them and deselects them again.
+    # Returns the path of the exported file, or None if there was nothing to export
+    def export_job(self, context, job):
+        if self.is_isolated(job):
+            self.in_isolated_scene = True
+            try:
+                with self.isolated.override(context):
+                    return self.export_isolated_job(context, job)
+            finally:
+                self.in_isolated_scene = False
+
+        # Jobs are ordered by frame, so each frame is only evaluated once
+        if job.frame is not None and context.scene.frame_current != job.frame:
+            with self.profiler.phase('frame_set'):
+                context.scene.frame_set(job.frame)
+
+        if "collection" in job.options:
+            return self.export_collection_job(context, job)
+
+        with self.profiler.phase('select'):
+            for obj in job.objects:
                 obj.select_set(True)
-                self.export_selection(obj.name, context, base_dir)
 
-                # Deselect Obj
+        path = None
+        if context.selected_objects:
+            path = self.export_selection(job, context)
+
+        # Deselect
+        with self.profiler.phase('deselect'):
+            for obj in context.selected_objects:
                 obj.select_set(False)
+        return path
+
+    # Links the job's objects to the export collection, exports them and unlinks them again,
+    # so the user's selection isn't touched
+    def export_collection_job(self, context, job):
+        collection = self.export_collection
+        with self.profiler.phase('select'):
+            for obj in job.objects:
+                collection.objects.link(obj)
+
+        path = None
+        try:
+            if job.objects:
+                path = self.export_selection(job, context)
+        finally:
+            with self.profiler.phase('deselect'):
+                for obj in list(collection.objects):
+                    collection.objects.unlink(obj)
+        return path
+
+    # Exports linked duplicates of the job's objects from the temporary scene,
+    # called with the temporary scene as the context's scene
+    def export_isolated_job(self, context, job):
+        if job.frame is not None and context.scene.frame_current != job.frame:
+            with self.profiler.phase('frame_set'):
+                context.scene.frame_set(job.frame)
+
+        use_collection = "collection" in job.options
+        with self.profiler.phase('isolate'):
+            copies = self.isolated.add(job.objects)
+            for copy in copies:
+                if use_collection:
+                    self.export_collection.objects.link(copy)
+                else:
+                    copy.select_set(True)
+
+        # Removing the duplicates unlinks them from the export collection
+        try:
+            return self.export_selection(job, context) if copies else None
+        finally:
+            with self.profiler.phase('restore'):
+                self.isolated.clear()
+
+    def is_isolated(self, job):
+        return self.isolated is not None and (self.isolate_all or bool(job.lod_ratios))
+
+    def get_selected_objects(self, context):
+        if self.in_isolated_scene:
+            return self.isolated.get_selected_objects()
+        return context.selected_objects
+
+    # Hands the jobs to a pool of background Blender processes and collects their results
+    def export_parallel(self, context, settings):
+        keys = [job.key for job in self.jobs]
+        results = parallel.run_shards(
+            bpy.data.filepath, keys,
+            worker_count=settings.worker_count,
+            shard_size=settings.shard_size,
+            max_memory=settings.max_worker_memory,
+            on_result=self.record_shard,
+            groups=[job.frame for job in self.jobs] if plan.uses_frame_sequence(settings) else None,
+            scene=context.scene.name,
+            view_layer=context.view_layer.name,
+        )
+        self.file_count += results["file_count"]
+        self.errors += results["errors"]
+        self.exported.update(results["exported"])
+        self.log.events += results["events"]
+        for report in results["profiles"]:
+            self.profiler.merge(report)
+        if self.lod_cache:
+            self.lod_cache.hits += results["lod_cache"]["hits"]
+            self.lod_cache.misses += results["lod_cache"]["misses"]
+        self.peak_memory = max(self.peak_memory, results["peak_memory"])
+
+    # Journals the jobs of a worker as soon as it's done, so a resumed run doesn't redo them
+    def record_shard(self, result):
+        if self.journal:
+            for key, path in result["exported"].items():
+                self.journal.record(key, path)
+
+    # Runs the jobs listed in a shard spec (inside a worker process) and writes the results
+    def export_shard(self, context):
+        spec = parallel.read_spec(self.shard)
+        keys = set(spec["keys"])
+        max_memory = spec["max_memory"] * 1024 * 1024
+        done = []
+        self.jobs = [job for job in self.jobs if job.key in keys]
+        self.make_directories(self.jobs)
+        for job in self.jobs:
+            # Hand the remaining jobs back so a fresh worker can pick them up
+            memory = self.sample_memory()
+            if max_memory and done and memory > max_memory:
+                break
+            try:
+                self.run_job(context, job)
+            except Exception as e:
+                self.errors.append(f"Failed to export {job.name}: {e}")
+                for obj in context.selected_objects:
+                    obj.select_set(False)
+            done.append(job.key)
+        profile = self.profiler.get_report() if self.profiler.enabled else None
+        parallel.write_result(spec, self.file_count, self.errors, done, self.exported,
+                              self.get_lod_cache_counts(), self.peak_memory, self.log.events, profile)
 
-        elif settings.mode == 'PARENT_OBJECTS':
-            exportObjects = self.get_filtered_objects(context, settings)
+    def export_selection(self, job, context):
+        settings = context.scene.batch_export
 
-            for obj in exportObjects:
-                if obj.parent in exportObjects:
-                    continue  # if it has a parent, skip it for now, it'll be exported when we get to its parent
+        # Builds the LodGroups and the stand-ins shared by all formats, their
+        # temporary objects are removed after the export
+        use_collection = "collection" in job.options
+        export_collection = self.export_collection if use_collection else None
+        lod_builder = lod.LodBuilder(context, self.lod_cache, export_collection)
+        baked_objects = bake.BakedObjects(context, export_collection)
+
+        objectsloop = list(self.export_collection.objects) if use_collection else self.get_selected_objects(context)
+        # If exporting by parent, don't set child (object that has a parent) transform
+        if "PARENT" in settings.mode:
+            selectedSet = set(objectsloop)
+            roots = [obj for obj in objectsloop if obj.parent not in selectedSet]
+        else:
+            roots = objectsloop
+
+        # save the transform to be reset later, and set the job's
+        transforms = None
+        if job.location is not None or job.rotation is not None or job.scale is not None:
+            with self.profiler.phase('transform'):
+                transforms = utils.TransformSnapshot(roots)
+                transforms.apply(job.location, job.rotation, job.scale)
+
+        try:
+            # Evaluate the modifiers once for every format, unless a format exports
+            # animation that needs the modifiers evaluated on every frame
+            animated = any(bake.exports_animation(extra_format.file_format, extra_format.options)
+                           for extra_format in job.extra_formats)
+            if job.extra_formats and settings.apply_mods and not animated:
+                with self.profiler.phase('bake'):
+                    objectsloop = baked_objects.add(objectsloop)
+                    roots = [baked_objects.standins.get(obj, obj) for obj in roots]
+
+            # The other formats go first, LODs are only for the job's own format
+            for extra_format in job.extra_formats:
+                with self.profiler.phase('export'):
+                    self.run_exporter(job, extra_format.file_format, extra_format.operator, extra_format.options,
+                                      use_collection, objectsloop)
+                self.file_count += 1
 
-                # Export Selection
-                obj.select_set(True)
-                self.select_children_recursive(obj, context,)
+            # LOD Creation
+            if job.lod_ratios:
+                with self.profiler.phase('lod'):
+                    for obj in roots:
+                        if obj.type == 'MESH':
+                            lod_builder.add(obj, job.lod_ratios)
+
+            # Export
+            exported_objects = list(self.export_collection.objects) if use_collection else self.get_selected_objects(context)
+            with self.profiler.phase('export'):
+                self.run_exporter(job, job.file_format, job.operator, job.options, use_collection, exported_objects)
+        finally:
+            # Memory peaks while the temporary LOD meshes exist
+            if lod_builder.objects:
+                self.sample_memory()
+
+            with self.profiler.phase('restore'):
+                # LOD De-Creation, frees the temporary objects and meshes right away
+                lod_builder.cleanup()
+                baked_objects.cleanup()
+
+                # Reset the transform to what it was before
+                if transforms:
+                    transforms.restore()
 
-                if context.selected_objects:
-                    self.export_selection(obj.name, context, base_dir)
+        self.file_count += 1
+        return job.filepath
+
+    # Exports under a temporary name, renames the file once it's complete and adds it to the manifest
+    def run_exporter(self, job, file_format, operator, options, use_collection, objects):
+        start = time.perf_counter()
+        with journal.staged_file(options["filepath"]) as staged_path:
+            self.run_exporter_to(file_format, operator, dict(options, filepath=staged_path), use_collection, objects)
+        seconds = time.perf_counter() - start
+        self.log.file(job.key, options["filepath"], file_format, seconds)
+
+        if self.manifest:
+            with self.profiler.phase('manifest'):
+                triangles = manifest.count_triangles(objects, self.manifest_apply_mods)
+                self.manifest.record(options["filepath"], job.source, objects, file_format, triangles, seconds)
+
+    def run_exporter_to(self, file_format, operator, options, use_collection, objects):
+        # Write binary STL and PLY straight from the mesh data, without the operator's overhead
+        if self.fast_writers and writers.can_write(file_format, options):
+            try:
+                writers.write(file_format, options, objects)
+                return
+            except ValueError as e:
+                self.log.warning(f"Fast {file_format} writer can't write {options['filepath']}, using the exporter: {e}")
+
+        category, operator = operator.split('.')
+        export_operator = getattr(getattr(bpy.ops, category), operator)
+        if self.in_isolated_scene and not use_collection:
+            # The context's selected objects come from the window's view layer,
+            # not the temporary scene's, so hand them to the exporter directly
+            with self.isolated.override(bpy.context, selected_objects=objects):
+                self.call_exporter(export_operator, file_format, options, use_collection)
+        else:
+            self.call_exporter(export_operator, file_format, options, use_collection)
 
-                # Deselect
-                for obj in context.selected_objects:
-                    obj.select_set(False)
+    def call_exporter(self, export_operator, file_format, options, use_collection):
+        if file_format == "ABC":
+            # By default, alembic_export operator runs in the background, this messes up batch
+            # export though. alembic_export has an "as_background_job" arg that can be set to
+            # false to disable it, but its marked deprecated, saying that if you EXECUTE the
+            # operator rather than INVOKE it it runs in the foreground. Here I change the
+            # execution context to EXEC_REGION_WIN.
+            # docs.blender.org/api/current/bpy.ops.html?highlight=exec_default#execution-context
+            export_operator('EXEC_REGION_WIN', **options)
+        elif use_collection:
+            export_operator(**dict(options, collection=self.export_collection.name))
+        else:
+            export_operator(**options)
 
-        elif settings.mode == 'COLLECTIONS':
-            exportobjects = self.get_filtered_objects(context, settings)
-            
-            for col in bpy.data.collections.values():
-                # Check if collection objects are in filtered objects
-                for obj in col.objects:
-                    if not obj in exportobjects:
-                        continue
-                    obj.select_set(True)
-                
-                if context.selected_objects:
-                    if settings.full_hierarchy:
-                        if col.name != "Scene Collection":
-                            hierarchy = utils.get_collection_hierarchy(col.name)
-                            collection_dir = os.path.dirname(hierarchy)
-                            collection_dir = os.path.join(base_dir, collection_dir)
-                            
-                            if not os.path.exists(collection_dir):
-                                try:
-                                    os.makedirs(collection_dir)
-                                    print(f"Directory created: {collection_dir}")
-                                except OSError as e:
-                                    self.report({'ERROR'}, f"Error creating directory {collection_dir}: {e}")
-                            self.export_selection(col.name, context, collection_dir)
-                    else: # If object is just in Scene Collection it get's exported to base_dir
-                        self.export_selection(col.name, context, base_dir)
-
-                # Deselect
-                for obj in context.selected_objects:
-                    obj.select_set(False)
 
-        # Functionality for both COLLECTION_SUBDIRECTORIES and COLLECTION_SUBDIR_PARENTS
-        elif 'COLLECTION_SUBDIR' in settings.mode:
-            exportobjects = self.get_filtered_objects(context, settings)
-
-            for obj in exportobjects:
-                if 'PARENT' in settings.mode and obj.parent in exportobjects:
-                    continue  # if it has a parent, skip it for now, it'll be exported when we get to its parent
-
-                # Modify base_dir to add collection, creating directory if necessary
-                sCollection = obj.users_collection[0].name
-                if sCollection != "Scene Collection":
-                    if settings.full_hierarchy:
-                        hierarchy = utils.get_collection_hierarchy(sCollection)
-                        collection_dir = os.path.join(base_dir, hierarchy)
-                    else:
-                        collection_dir = os.path.join(base_dir, sCollection)
-
-                    # create sub-directory if it doesn't exist
-                    if not os.path.exists(collection_dir):
-                        try:
-                            os.makedirs(collection_dir)
-                            print(f"Directory created: {collection_dir}")
-                        except OSError as e:
-                            self.report({'ERROR'}, f"Error creating directory {collection_dir}: {e}")
-                else: # If object is just in Scene Collection it get's exported to base_dir
-                    collection_dir = base_dir
-
-                # Select
-                obj.select_set(True)
-                if 'PARENT' in settings.mode:
-                    self.select_children_recursive(obj, context)
+# Operator called when pressing the batch export button.
+class EXPORT_MESH_OT_batch(BatchExportRunner, Operator):
+    """Export many objects to seperate files all at once"""
+    bl_idname = "export_mesh.batch"
+    bl_label = "Batch Export"
 
-                # Export
-                self.export_selection(obj.name, context, collection_dir)
+    # Path to a shard spec written by parallel.run_shards, only set in worker processes
+    shard: StringProperty(options={'HIDDEN', 'SKIP_SAVE'})
+    # Path to write a JSON summary of the run to, used by the command-line entry point
+    summary: StringProperty(options={'HIDDEN', 'SKIP_SAVE'})
+    # Set by watch mode, to re-export only the jobs touched by the changes it recorded
+    watch: BoolProperty(options={'HIDDEN', 'SKIP_SAVE'})
 
-                # Deselect
-                for obj in context.selected_objects:
-                    obj.select_set(False)
+    def execute(self, context):
+        settings = context.scene.batch_export
 
-        elif settings.mode == 'SCENE':
-            prefix = settings.prefix
-            suffix = settings.suffix
-            
-            filename = ''
-            if not prefix and not suffix:
-                filename = bpy.path.basename(bpy.context.blend_data.filepath).split('.')[0]
-            
-            for obj in self.get_filtered_objects(context, settings):
-                obj.select_set(True)
-            self.export_selection(filename, context, base_dir)
+        # Workers open the saved .blend, so unsaved changes would silently be missing
+        use_parallel = settings.use_parallel and not self.shard and not self.watch
+        if use_parallel and (not bpy.data.is_saved or bpy.data.is_dirty):
+            self.report({'ERROR'}, "Save .blend file before a parallel export\n(worker processes read the saved file)")
+            return {'FINISHED'}
 
-        # Return selection to how it was
-        bpy.ops.object.select_all(action='DESELECT')
-        for obj in selection:
-            obj.select_set(True)
-        view_layer.objects.active = obj_active
+        changes = watch.pop_changes() if self.watch else None
+        if not self.begin_run(context, use_cache=not self.shard, changes=changes):
+            if self.summary:
+                self.write_summary(self.summary)
+            return {'FINISHED'}
 
-        # Return to whatever mode the user was in
-        if obj_active:
-            bpy.ops.object.mode_set(mode=mode)
+        # Restore the user's state and remove the temporary scene and collection even if an exporter fails
+        try:
+            if use_parallel:
+                self.export_parallel(context, settings)
+            elif self.shard:
+                self.export_shard(context)
+            else:
+                self.make_directories(self.jobs)
+                for job in self.jobs:
+                    if self.over_memory_budget():
+                        break
+                    self.run_job(context, job)
+        except Exception as e:
+            self.errors.append(f"Batch export stopped: {e}")
+            raise
+        finally:
+            self.end_run(context)
+            if self.summary:
+                self.write_summary(self.summary)
+        return {'FINISHED'}
 
-        if self.file_count == 0:
-            self.report({'ERROR'}, "NOTHING TO EXPORT")
-        else:
-            self.report({'INFO'}, "Exported " +
-                        str(self.file_count) + " file(s)")
 
-        return {'FINISHED'}
+# Same as the batch export, but exports one file per timer tick so the UI keeps
+# showing progress, and can be cancelled with Esc
+class EXPORT_MESH_OT_batch_modal(BatchExportRunner, Operator):
+    """Export many objects to seperate files, showing progress. Press Esc to cancel"""
+    bl_idname = "export_mesh.batch_modal"
+    bl_label = "Batch Export with Progress"
 
-    # Finds all renderable objects and returns a list of them
-    def get_renderable_objects(self):
-        """
-        Recursively collect hidden objects from scene collections.
-        
-        Returns:
-            list: A list of objects hidden in viewport or render
-        """
-        renderable_objects = []
-        
-        def check_collection(collection):
-            # Skip if collection is None
-            if not collection:
-                return
-            
-            # Skip if the entire collection is hidden in render
-            if collection.hide_render:
-                return
-            
-            # Check objects in this collection
-            for obj in collection.objects:
-                # Check both viewport and render visibility
-                if not obj.hide_render:
-                    renderable_objects.append(obj)
-            
-            # Recursively check child collections
-            while collection.children:
-                for child_collection in collection.children:
-                    # Skip child collections that are hidden in render
-                    if not child_collection.hide_render:
-                        check_collection(child_collection)
-                break  # Use break to match the while loop structure
-        
-        # Start the recursive check from the scene's root collection
-        check_collection(bpy.context.scene.collection)
-        
-        return renderable_objects
-
-    # Deselect and Get Objects to Export by Limit Settings
-    def get_filtered_objects(self, context, settings):
-        objects = context.view_layer.objects.values()
-        if settings.limit == 'VISIBLE':
-            filtered_objects = []
-            for obj in objects:
-                obj.select_set(False)
-                if obj.visible_get() and obj.type in settings.object_types:
-                    filtered_objects.append(obj)
-            return filtered_objects
-        if settings.limit == 'SELECTED':
-            selection = context.selected_objects
-            filtered_objects = []
-            for obj in objects:
-                obj.select_set(False)
-                if obj in selection:
-                    if obj.type in settings.object_types:
-                        filtered_objects.append(obj)
-            return filtered_objects
-        if settings.limit == 'RENDERABLE':
-            filtered_objects = []
-            for obj in objects:
-                obj.select_set(False)
-                if obj.visible_get() and obj.type in settings.object_types:
-                    if obj in self.get_renderable_objects():
-                        filtered_objects.append(obj)
-            return filtered_objects
-        return objects
-
-    def select_children_recursive(self, obj, context):
-        for c in obj.children:
-            if obj.type in context.scene.batch_export.object_types:
-                c.select_set(True)
-            self.select_children_recursive(c, context)
-
-    def export_selection(self, itemname, context, base_dir):
+    # Events still handled by Blender while exporting, everything else is blocked
+    # so clicks can't change the selection the export relies on
+    PASS_THROUGH_EVENTS = {
+        'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+        'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'MOUSESMARTZOOM',
+    }
+
+    def invoke(self, context, event):
         settings = context.scene.batch_export
-        # save the transform to be reset later:
-        old_locations = []
-        old_rotations = []
-        old_scales = []
-        
-        # Extra objects for LOD export store for later removal
-        preLodObjects = []
-        lodObjects = []
-
-        objectsloop = context.selected_objects
-        for obj in objectsloop:
-            # Save Old Locations
-            old_locations.append(obj.location.copy())
-            old_rotations.append(obj.rotation_euler.copy())
-            old_scales.append(obj.scale.copy())
-
-            # If exporting by parent, don't set child (object that has a parent) transform
-            if "PARENT" in settings.mode and obj.parent in context.selected_objects:
-                continue
-            else:
-                if settings.set_location:
-                    obj.location = settings.location
-                if settings.set_rotation:
-                    obj.rotation_euler = settings.rotation
-                if settings.set_scale:
-                    obj.scale = settings.scale
-
-            # Change Itemname If Collection As Prefix
-            if settings.prefix_collection and 'OBJECT' in settings.mode:
-                collection_name = obj.users_collection[0].name
-                if not collection_name == 'Scene Collection':
-                    itemname = "_".join([collection_name, itemname])
 
-            # LOD Creation
-            if settings.create_lod and settings.file_format == 'FBX' and obj.type == 'MESH':
-                # Save obj info and backup
-                obj_CollectionObjs = obj.users_collection[0].objects
-                name = obj.name
-                obj.name = name + '_preLOD'
-                preLodObjects.append(obj)
+        # Workers run in their own processes, so there's nothing to step through
+        if settings.use_parallel:
+            return bpy.ops.export_mesh.batch()
+
+        if not self.begin_run(context):
+            return {'FINISHED'}
+
+        self.make_directories(self.jobs)
+        self.job_index = 0
+        self.start_time = time.perf_counter()
+
+        wm = context.window_manager
+        wm.progress_begin(0, max(1, len(self.jobs)))
+        self.timer = wm.event_timer_add(0.001, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            return self.finish(context, cancelled=True)
+        if event.type != 'TIMER':
+            if event.type in self.PASS_THROUGH_EVENTS or event.type.startswith('NDOF'):
+                return {'PASS_THROUGH'}
+            return {'RUNNING_MODAL'}
+        if self.job_index >= len(self.jobs):
+            return self.finish(context)
+
+        if self.over_memory_budget():
+            return self.finish(context)
+
+        job = self.jobs[self.job_index]
+        try:
+            self.run_job(context, job)
+        except Exception as e:
+            self.errors.append(f"Failed to export {job.name}: {e}")
+            for obj in context.selected_objects:
                 obj.select_set(False)
+        self.job_index += 1
+
+        # Progress
+        elapsed = time.perf_counter() - self.start_time
+        rate = self.job_index / elapsed if elapsed > 0 else 0.0
+        remaining = (len(self.jobs) - self.job_index) / rate if rate > 0 else 0.0
+        context.window_manager.progress_update(self.job_index)
+        context.workspace.status_text_set(
+            f"Batch Export: {self.job_index}/{len(self.jobs)} file(s), "
+            f"{rate:.1f} files/s, ETA {remaining:.0f}s  (Esc to cancel)")
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context, cancelled=False):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        self.end_run(context, cancelled=cancelled)
+        return {'CANCELLED'} if cancelled else {'FINISHED'}
+
+
+# Builds the export plan and prints it without exporting anything
+class EXPORT_MESH_OT_batch_dry_run(Operator):
+    """List the files Batch Export would write, without exporting anything"""
+    bl_idname = "export_mesh.batch_dry_run"
+    bl_label = "Dry Run"
 
-                # Setup LOD parent object
-                lodParent = bpy.data.objects.new("Empty_Name", None)
-                obj_CollectionObjs.link(lodParent)
-                lodParent.location = obj.location
-                lodParent.rotation_quaternion = obj.rotation_quaternion
-                lodParent.name = name
-                lodParent["fbx_type"] = "LodGroup"
-                if obj.parent:
-                    lodParent.parent = obj.parent
-                lodObjects.append(lodParent)
-                lodParent.select_set(True)
-
-                # Create LOD0 copy
-                lod0 = obj.copy()
-                lod0.data = lod0.data.copy() # linked = false
-                lod0.name = name + f"_LOD0"
-                lod0.parent = lodParent
-                lod0.location = (0,0,0)
-                obj_CollectionObjs.link(lod0)
-                lodObjects.append(lod0)
-                lod0.select_set(True)
-
-                # Loop over and create each LOD object
-                for lodcount in range(settings.lod_count):
-                    lod = lod0.copy()
-                    lod.data = lod.data.copy() # linked = false
-                    lod.name = name + f"_LOD{lodcount+1}"
-                    lod.parent = lodParent
-                    obj_CollectionObjs.link(lod)
-                    lodObjects.append(lod)
-                    lod.select_set(True)
-
-                    # Decimation
-                    decimate_mod = lod.modifiers.new('lodding', type='DECIMATE')
-                    ratio_attr_name = f"lod{lodcount+1}_ratio"
-                    decimate_mod.ratio = getattr(settings, ratio_attr_name)
-                    
-                    #bpy.ops.object.modifier_apply(modifier=decimate_mod.name)
-                settings.apply_mods = True
-                # THIS DOESNT WORK settings.object_types.EMPTY = True
-
-
-        prefix = settings.prefix
-        suffix = settings.suffix
-        name = prefix + bpy.path.clean_name(itemname) + suffix
-        fp = os.path.join(base_dir, name)
-
-        # Export
-
-        if settings.file_format == "DAE":
-            options = utils.load_operator_preset(
-                'wm.collada_export', settings.dae_preset)
-            options["filepath"] = fp
-            options["selected"] = True
-            options["apply_modifiers"] = settings.apply_mods
-            bpy.ops.wm.collada_export(**options)
-
-        elif settings.file_format == "ABC":
-            options = utils.load_operator_preset(
-                'wm.alembic_export', settings.abc_preset)
-            options["filepath"] = fp+".abc"
-            options["selected"] = True
-            options["start"] = settings.frame_start
-            options["end"] = settings.frame_end
-            # By default, alembic_export operator runs in the background, this messes up batch
-            # export though. alembic_export has an "as_background_job" arg that can be set to
-            # false to disable it, but its marked deprecated, saying that if you EXECUTE the
-            # operator rather than INVOKE it it runs in the foreground. Here I change the
-            # execution context to EXEC_REGION_WIN.
-            # docs.blender.org/api/current/bpy.ops.html?highlight=exec_default#execution-context
-            bpy.ops.wm.alembic_export('EXEC_REGION_WIN', **options)
-
-        elif settings.file_format == "USD":
-            options = utils.load_operator_preset(
-                'wm.usd_export', settings.usd_preset)
-            options["filepath"] = fp+settings.usd_format
-            options["selected_objects_only"] = True
-            bpy.ops.wm.usd_export(**options)
-
-        elif settings.file_format == "SVG":
-            bpy.ops.wm.gpencil_export_svg(
-                filepath=fp+".svg", selected_object_type='SELECTED')
-
-        elif settings.file_format == "PDF":
-            bpy.ops.wm.gpencil_export_pdf(
-                filepath=fp+".pdf", selected_object_type='SELECTED')
-
-        elif settings.file_format == "OBJ":
-            options = utils.load_operator_preset(
-                'wm.obj_export', settings.obj_preset)
-            options["filepath"] = fp+".obj"
-            options["export_selected_objects"] = True
-            options["apply_modifiers"] = settings.apply_mods
-            bpy.ops.wm.obj_export(**options)
-
-        elif settings.file_format == "PLY":
-            bpy.ops.wm.ply_export(
-                filepath=fp+".ply", ascii_format=settings.ply_ascii, export_selected_objects=True, apply_modifiers=settings.apply_mods)
-
-        elif settings.file_format == "STL":
-            bpy.ops.wm.stl_export(
-                filepath=fp+".stl", ascii_format=settings.stl_ascii, export_selected_objects=True, apply_modifiers=settings.apply_mods)
-
-        elif settings.file_format == "FBX":
-            options = utils.load_operator_preset(
-                'export_scene.fbx', settings.fbx_preset)
-            options["filepath"] = fp+".fbx"
-            options["use_selection"] = True
-            options["use_mesh_modifiers"] = settings.apply_mods
-            bpy.ops.export_scene.fbx(**options)
-
-            # LOD De-Creation
-            if settings.create_lod:
-                for lod in lodObjects:
-                    bpy.data.objects.remove(lod, do_unlink=True)
-                for obj in preLodObjects:
-                    if '_preLOD' in obj.name:
-                        obj.name = obj.name[0:-7]
-                        
-
-        elif settings.file_format == "glTF":
-            options = utils.load_operator_preset(
-                'export_scene.gltf', settings.gltf_preset)
-            options["filepath"] = fp
-            options["use_selection"] = True
-            options["export_apply"] = settings.apply_mods
-            bpy.ops.export_scene.gltf(**options)
-
-        # Reset the transform to what it was before
-        i = 0
-        for obj in context.selected_objects:
-            obj.location = old_locations[i]
-            obj.rotation_euler = old_rotations[i]
-            obj.scale = old_scales[i]
-            i += 1
-
-        print("exported: ", fp)
-        self.file_count += 1
+    def execute(self, context):
+        settings = context.scene.batch_export
+        base_dir, error = plan.get_base_dir(settings)
+        if error:
+            self.report({'ERROR'}, error)
+            return {'FINISHED'}
+
+        jobs = plan.compile_plan(context, settings, base_dir)
+        lines = plan.format_plan(jobs)
+        for line in lines:
+            print(line)
+        self.report({'INFO'}, lines[-1])
+        return {'FINISHED'}
+
+
+# Lists every file of the plan with its triangle count and expected size, and
+# estimates the run time from previous runs
+class EXPORT_MESH_OT_batch_estimate(Operator):
+    """Estimate the size and duration of a batch export, without exporting anything"""
+    bl_idname = "export_mesh.batch_estimate"
+    bl_label = "Estimate"
+
+    def execute(self, context):
+        settings = context.scene.batch_export
+        base_dir, error = plan.get_base_dir(settings)
+        if error:
+            self.report({'ERROR'}, error)
+            return {'FINISHED'}
+
+        jobs = plan.compile_plan(context, settings, base_dir)
+        lines, warnings = estimate.estimate_plan(context, settings, base_dir, jobs)
+        for line in lines:
+            print(line)
+        for warning in warnings:
+            print("Outlier: " + warning)
+            self.report({'WARNING'}, warning)
+        self.report({'INFO'}, lines[-1])
+        return {'FINISHED'}
+
+
+# Lists the operator presets again, e.g. after adding presets on a network drive
+class EXPORT_MESH_OT_batch_refresh_presets(Operator):
+    """Look for new, changed or removed export presets"""
+    bl_idname = "export_mesh.batch_refresh_presets"
+    bl_label = "Refresh Presets"
+
+    def execute(self, context):
+        utils.refresh_operator_presets()
+        return {'FINISHED'}
 
 
 registry = [
     EXPORT_MESH_OT_batch,
+    EXPORT_MESH_OT_batch_modal,
+    EXPORT_MESH_OT_batch_dry_run,
+    EXPORT_MESH_OT_batch_estimate,
+    EXPORT_MESH_OT_batch_refresh_presets,
 ]
\ No newline at end of file
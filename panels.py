@@ -1,6 +1,7 @@
 import bpy
 from bpy.types import Panel
 import os
+from . import plan
 
 # Get addon name from directory structure
 def get_addon_name():
@@ -19,24 +20,48 @@ def get_addon_name_from_bl_info():
                 return mod_name
     return __package__  # Fallback to package name
 
+# Draws a preset dropdown with a button to look for new presets
+def draw_preset(layout, settings, prop_name):
+    row = layout.row(align=True)
+    row.prop(settings, prop_name)
+    row.operator('export_mesh.batch_refresh_presets', text='', icon='FILE_REFRESH')
+
 # Draws the .blend file specific settings used in the
 # Popover panel or Side Panel panel
 def draw_settings(self, context):
     self.layout.use_property_split = True
     self.layout.use_property_decorate = False
     settings = context.scene.batch_export
-    self.layout.operator('export_mesh.batch', icon='EXPORT')
+    row = self.layout.row(align=True)
+    row.operator('export_mesh.batch', icon='EXPORT')
+    row.operator('export_mesh.batch_modal', text='', icon='TIME')
+    row.operator('export_mesh.batch_dry_run', text='', icon='VIEWZOOM')
+    row.operator('export_mesh.batch_estimate', text='', icon='SORTTIME')
     self.layout.separator()
     col = self.layout.column(align=True)
     col.prop(settings, 'directory')
     col.prop(settings, 'prefix')
     col.prop(settings, 'suffix')
+    col.prop(settings, 'incremental')
+    col.prop(settings, 'watch')
+    if settings.watch:
+        col.prop(settings, 'watch_trigger')
+        if settings.watch_trigger == 'DEBOUNCE':
+            col.prop(settings, 'watch_delay')
+    col.prop(settings, 'resume')
+    col.prop(settings, 'manifest')
+    col.prop(settings, 'profile')
+    col.prop(settings, 'verbose')
+    col.prop(settings, 'keep_selection')
+    col.prop(settings, 'isolate')
+    col.prop(settings, 'memory_budget')
     self.layout.separator()
 
     # Export Settings
     col = self.layout.column(align=True)
     col.label(text="Export Settings:")
     col.prop(settings, 'file_format')
+    col.prop(settings, 'extra_formats')
     col.prop(settings, 'mode')
     col.prop(settings, 'limit')
     if 'OBJECT' in settings.mode:
@@ -49,33 +74,41 @@ def draw_settings(self, context):
     col = self.layout.column()
     col.label(text=settings.file_format + " Settings:")
     if settings.file_format == 'DAE':
-        col.prop(settings, 'dae_preset_enum')
+        draw_preset(col, settings, 'dae_preset_enum')
         self.layout.prop(settings, 'apply_mods')
     elif settings.file_format == 'ABC':
-        col.prop(settings, 'abc_preset_enum')
+        draw_preset(col, settings, 'abc_preset_enum')
         col.prop(settings, 'frame_start')
         col.prop(settings, 'frame_end')
     elif settings.file_format == 'USD':
         col.prop(settings, 'usd_format')
-        col.prop(settings, 'usd_preset_enum')
+        draw_preset(col, settings, 'usd_preset_enum')
     elif settings.file_format == 'OBJ':
-        col.prop(settings, 'obj_preset_enum')
+        draw_preset(col, settings, 'obj_preset_enum')
         self.layout.prop(settings, 'apply_mods')
     elif settings.file_format == 'PLY':
         col.prop(settings, 'ply_ascii')
+        col.prop(settings, 'fast_writers')
         self.layout.prop(settings, 'apply_mods')
     elif settings.file_format == 'STL':
         col.prop(settings, 'stl_ascii')
+        col.prop(settings, 'fast_writers')
         self.layout.prop(settings, 'apply_mods')
     elif settings.file_format == 'FBX':
-        col.prop(settings, 'fbx_preset_enum')
+        draw_preset(col, settings, 'fbx_preset_enum')
         self.layout.prop(settings, 'apply_mods')
     elif settings.file_format == 'glTF':
-        col.prop(settings, 'gltf_preset_enum')
+        draw_preset(col, settings, 'gltf_preset_enum')
         self.layout.prop(settings, 'apply_mods')
     elif settings.file_format == 'X3D':
-        col.prop(settings, 'x3d_preset_enum')
+        draw_preset(col, settings, 'x3d_preset_enum')
         self.layout.prop(settings, 'apply_mods')
+    if settings.file_format in plan.FRAME_SEQUENCE_FORMATS:
+        self.layout.prop(settings, 'frame_sequence')
+        if settings.frame_sequence:
+            col = self.layout.column(align=True)
+            col.prop(settings, 'frame_start')
+            col.prop(settings, 'frame_end')
     self.layout.use_property_split = False
     self.layout.separator()
 
@@ -106,6 +139,17 @@ def draw_settings(self, context):
             for count in range(settings.lod_count):
                 prop_name = f'lod{count+1}_ratio' 
                 col.prop(settings, prop_name)
+            col.prop(settings, 'lod_cache')
+            if settings.lod_cache:
+                col.prop(settings, 'lod_cache_size')
+
+    # Parallel Export
+    col = self.layout.column(align=True, heading="Parallel:")
+    col.prop(settings, 'use_parallel')
+    if settings.use_parallel:
+        col.prop(settings, 'worker_count')
+        col.prop(settings, 'shard_size')
+        col.prop(settings, 'max_worker_memory')
 
 
 # Draws the button and popover dropdown button used in the
@@ -0,0 +1,216 @@
+import bpy
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+# Script run inside each background Blender worker
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "worker.py")
+
+# How often the pool checks on its workers, in seconds
+POLL_INTERVAL = 0.1
+
+
+# Splits the keys into shards of shard_size keys. With groups (a group per key, e.g. its
+# frame), shards only end between groups, so a group is never split over two workers
+def split_shards(keys, shard_size, groups=None):
+    shard_size = max(1, shard_size)
+    if groups is None:
+        return [keys[i:i + shard_size] for i in range(0, len(keys), shard_size)]
+    shards = [[]]
+    for i, key in enumerate(keys):
+        if len(shards[-1]) >= shard_size and groups[i] != groups[i - 1]:
+            shards.append([])
+        shards[-1].append(key)
+    return [shard for shard in shards if shard]
+
+
+def write_spec(directory, index, keys, max_memory, scene=None, view_layer=None):
+    """
+    Writes the spec file a worker reads to know which jobs to export.
+
+    Args:
+        directory (str): Temporary directory shared by the pool.
+        index (int): Unique number of the shard, used for the file names.
+        keys (list): Job keys the worker should export.
+        max_memory (int): Memory in MB after which the worker stops taking jobs, 0 for no limit.
+        scene (str): Name of the scene to plan the jobs in, the file's active scene if None.
+        view_layer (str): Name of the view layer to plan the jobs in, which decides the
+            visible and selected objects. The scene's first view layer if None.
+
+    Returns:
+        dict: The spec, including the path of the spec file and of the result file.
+    """
+    spec = {
+        "package": __package__,
+        "keys": keys,
+        "max_memory": max_memory,
+        "scene": scene,
+        "view_layer": view_layer,
+        "path": os.path.join(directory, f"shard_{index}.json"),
+        "result": os.path.join(directory, f"shard_{index}_result.json"),
+        "log": os.path.join(directory, f"shard_{index}.log"),
+    }
+    with open(spec["path"], 'w') as file:
+        json.dump(spec, file)
+    return spec
+
+
+def read_spec(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+# Called by the worker once it's done with its shard
+def write_result(spec, file_count, errors, done, exported, lod_cache=None, peak_memory=0, events=None, profile=None):
+    result = {
+        "file_count": file_count,
+        "errors": errors,
+        "done": done,
+        "exported": exported,
+        "lod_cache": lod_cache or {"hits": 0, "misses": 0},
+        "peak_memory": peak_memory,
+        "events": events or [],
+        "profile": profile,
+    }
+    with open(spec["result"], 'w') as file:
+        json.dump(result, file)
+
+
+def read_result(spec):
+    if not os.path.isfile(spec["result"]):
+        return None
+    try:
+        with open(spec["result"], 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def start_worker(blend_path, spec):
+    command = [
+        bpy.app.binary_path,
+        "--background", blend_path,
+        "--python-exit-code", "1",
+        "--python", WORKER_SCRIPT,
+        "--", spec["path"],
+    ]
+    # Log to a file rather than a pipe so a chatty worker can't block on a full pipe
+    with open(spec["log"], 'w') as log:
+        return subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+
+
+# Returns the last line a worker printed, useful to explain why it failed
+def read_last_log_line(spec):
+    try:
+        with open(spec["log"], 'r', errors='replace') as file:
+            lines = file.read().strip().splitlines()
+    except OSError:
+        return ''
+    return lines[-1] if lines else ''
+
+
+def run_pool(queue, worker_count, start, on_exit):
+    """
+    Runs a process for every task in the queue, at most worker_count at once, blocking
+    until all of them exited. Shared by the shard workers and the command line's
+    one-process-per-file export.
+
+    Args:
+        queue (list): Tasks to run, on_exit may append more.
+        worker_count (int): Maximum number of processes running at once.
+        start (callable): Starts the process of a task and returns its subprocess.Popen.
+        on_exit (callable): Called with a task and its process once the process exited.
+    """
+    running = []
+    while queue or running:
+        # Fill up the pool
+        while queue and len(running) < max(1, worker_count):
+            task = queue.pop(0)
+            running.append((start(task), task))
+
+        time.sleep(POLL_INTERVAL)
+
+        for process, task in running[:]:
+            if process.poll() is None:
+                continue
+            running.remove((process, task))
+            on_exit(task, process)
+
+
+def run_shards(blend_path, keys, worker_count=4, shard_size=50, max_memory=0, on_result=None, groups=None,
+               scene=None, view_layer=None):
+    """
+    Exports the jobs with the given keys from a saved .blend file using a pool
+    of background Blender processes, blocking until all of them are done.
+
+    Jobs a worker hands back because it hit max_memory are queued again as a
+    new shard, so every worker process starts with a fresh memory footprint.
+
+    Args:
+        blend_path (str): The saved .blend file the workers open.
+        keys (list): Keys of the jobs to export, as built by the batch operator.
+        worker_count (int): Maximum number of Blender processes running at once.
+        shard_size (int): Maximum number of jobs handed to one worker.
+        max_memory (int): Memory in MB per worker before it's recycled, 0 for no limit.
+        on_result (callable): Called with the result of every worker as soon as it finished.
+        groups (list): Group of every key, shards are only split between groups.
+        scene (str): Name of the scene the keys were planned in.
+        view_layer (str): Name of the view layer the keys were planned in, workers plan
+            in the same one so they build the same keys.
+
+    Returns:
+        dict: "file_count" with the number of exported files, "errors" with a
+        list of error messages from all workers, "exported" mapping the keys
+        of exported jobs to their file paths and "lod_cache" with the summed
+        LOD cache hits and misses, "peak_memory" with the highest memory
+        use of any worker in bytes, "events" with the workers' event logs and
+        "profiles" with the profile reports of the workers that profiled.
+    """
+    results = {"file_count": 0, "errors": [], "exported": {}, "lod_cache": {"hits": 0, "misses": 0},
+               "peak_memory": 0, "events": [], "profiles": []}
+
+    with tempfile.TemporaryDirectory(prefix="batch_export_") as directory:
+        specs = []
+
+        def new_spec(shard):
+            specs.append(write_spec(directory, len(specs), shard, max_memory, scene, view_layer))
+            return specs[-1]
+
+        def on_exit(spec, process):
+            result = read_result(spec)
+            if result is None:
+                message = f"Worker exited with code {process.returncode} before finishing {len(spec['keys'])} job(s)"
+                last_line = read_last_log_line(spec)
+                if last_line:
+                    message += ": " + last_line
+                results["errors"].append(message)
+                return
+
+            results["file_count"] += result["file_count"]
+            results["errors"] += result["errors"]
+            results["exported"].update(result["exported"])
+            for name, count in result["lod_cache"].items():
+                results["lod_cache"][name] += count
+            results["peak_memory"] = max(results["peak_memory"], result["peak_memory"])
+            results["events"] += result["events"]
+            if result["profile"] is not None:
+                results["profiles"].append(result["profile"])
+            if on_result:
+                on_result(result)
+
+            # Requeue jobs the worker handed back after hitting its memory limit
+            done = set(result["done"])
+            pending = [key for key in spec["keys"] if key not in done]
+            if pending:
+                if done:
+                    queue.append(new_spec(pending))
+                else:
+                    results["errors"].append(
+                        f"Worker made no progress on {len(pending)} job(s)")
+
+        queue = [new_spec(shard) for shard in split_shards(list(keys), shard_size, groups)]
+        run_pool(queue, worker_count, lambda spec: start_worker(blend_path, spec), on_exit)
+
+    return results
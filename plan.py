@@ -0,0 +1,405 @@
+import bpy
+import os
+from dataclasses import dataclass, field, replace
+from . import profiling, utils
+
+# Exporter operator and property holding the saved preset (or None) for each format,
+# the options making it export only the selected objects are set by get_format_options
+FORMATS = {
+    'DAE': ('wm.collada_export', 'dae_preset'),
+    'ABC': ('wm.alembic_export', 'abc_preset'),
+    'USD': ('wm.usd_export', 'usd_preset'),
+    'SVG': ('wm.gpencil_export_svg', None),
+    'PDF': ('wm.gpencil_export_pdf', None),
+    'OBJ': ('wm.obj_export', 'obj_preset'),
+    'PLY': ('wm.ply_export', None),
+    'STL': ('wm.stl_export', None),
+    'FBX': ('export_scene.fbx', 'fbx_preset'),
+    'glTF': ('export_scene.gltf', 'gltf_preset'),
+}
+
+
+# Collection the jobs' objects are linked to when exporting without selecting them,
+# passed to the exporters as their "collection" option
+EXPORT_COLLECTION_NAME = "BatchExport_Job"
+
+# Formats that can be exported as one file per frame
+FRAME_SEQUENCE_FORMATS = ('OBJ', 'PLY', 'STL', 'glTF')
+
+# Exporter options that limit the export to the selected objects
+SELECTION_OPTIONS = ("selected", "selected_objects_only", "export_selected_objects", "use_selection")
+
+
+@dataclass
+class ExtraFormat:
+    """Another format a job's objects are exported to, along with the job's own format."""
+    file_format: str
+    operator: str
+    options: dict  # Arguments for the exporter operator, including the filepath
+    filepath: str
+
+
+@dataclass
+class ExportJob:
+    """A single file to export and everything needed to export it."""
+    key: str  # Stable name of the job's source, used to hand jobs to workers and caches
+    name: str  # Item name the file name is built from
+    directory: str
+    filepath: str  # Full path of the exported file, including the extension
+    objects: list
+    file_format: str
+    operator: str  # Exporter operator, e.g. 'export_scene.fbx'
+    options: dict  # Arguments for the exporter operator
+    location: tuple = None  # Transform overrides, None if not set
+    rotation: tuple = None
+    scale: tuple = None
+    lod_ratios: list = field(default_factory=list)  # Decimate ratio of each LOD, empty for no LODs
+    extra_formats: list = field(default_factory=list)  # ExtraFormat of every other format to export to
+    frame: int = None  # Frame to export in a frame sequence, None to export the current frame
+
+    @property
+    def source(self):
+        """Name of the object or collection the job exports, its key without the frame."""
+        return self.key if self.frame is None else self.key.rsplit('@', 1)[0]
+
+
+def get_base_dir(settings):
+    """
+    Resolves the export directory of the settings.
+
+    Returns:
+        tuple: The absolute directory and an error message, which is None if the directory can be used.
+    """
+    base_dir = settings.directory
+    if not bpy.data.is_saved:  # Then the blend file hasn't been saved
+        # Then the path should be relative
+        if base_dir != bpy.path.abspath(base_dir):
+            return base_dir, "Save .blend file somewhere before exporting to relative directory\n(or use an absolute directory)"
+    base_dir = bpy.path.abspath(base_dir)  # convert to absolute path
+    if not os.path.isdir(base_dir):
+        return base_dir, "Export directory doesn't exist"
+    return base_dir, None
+
+
+# Returns the file extension the exporter writes for the format, the settings' format by default
+def get_export_extension(settings, options, file_format=None):
+    file_format = file_format or settings.file_format
+    if file_format == 'USD':
+        return settings.usd_format
+    if file_format == 'glTF':
+        return '.glb' if options.get('export_format', 'GLB') == 'GLB' else '.gltf'
+    return '.' + file_format.lower()
+
+
+def uses_frame_sequence(settings):
+    return settings.frame_sequence and settings.file_format in FRAME_SEQUENCE_FORMATS
+
+
+# Returns the settings' format followed by the other formats to export to
+def get_file_formats(settings):
+    file_formats = [settings.file_format] + [
+        file_format for file_format in FORMATS
+        if file_format in settings.extra_formats and file_format != settings.file_format]
+    if uses_frame_sequence(settings):
+        file_formats = [file_format for file_format in file_formats if file_format in FRAME_SEQUENCE_FORMATS]
+    return file_formats
+
+
+# Adds the frame number to the name of a file, before its extension
+def get_frame_filepath(filepath, frame):
+    root, extension = os.path.splitext(filepath)
+    return f"{root}_{frame:04d}{extension}"
+
+
+# Returns a copy of the job exporting the given frame, to its own file
+def get_frame_job(job, frame):
+    filepath = get_frame_filepath(job.filepath, frame)
+    extra_formats = []
+    for extra_format in job.extra_formats:
+        extra_filepath = get_frame_filepath(extra_format.filepath, frame)
+        extra_formats.append(replace(
+            extra_format, filepath=extra_filepath, options=dict(extra_format.options, filepath=extra_filepath)))
+    return replace(job, key=f"{job.key}@{frame}", filepath=filepath, options=dict(job.options, filepath=filepath),
+                   extra_formats=extra_formats, frame=frame)
+
+
+def get_lod_ratios(settings):
+    if not (settings.create_lod and settings.file_format == 'FBX'):
+        return []
+    return [getattr(settings, f"lod{count+1}_ratio") for count in range(settings.lod_count)]
+
+
+def get_format_options(settings, file_format=None):
+    """
+    Builds the exporter arguments shared by every job, from the format's preset and settings.
+
+    Args:
+        settings (BatchExportSettings): The batch export settings to use.
+        file_format (str): One of FORMATS, the settings' format by default.
+
+    Returns:
+        tuple: The exporter operator's name and a dictionary of its arguments, without the filepath.
+    """
+    file_format = file_format or settings.file_format
+    operator, preset_prop = FORMATS[file_format]
+    options = {}
+    if preset_prop:
+        options = utils.load_operator_preset(operator, getattr(settings, preset_prop))
+
+    # LODs are built with modifiers, so they have to be applied
+    apply_mods = settings.apply_mods or file_format == settings.file_format and bool(get_lod_ratios(settings))
+
+    if file_format == 'DAE':
+        options["selected"] = True
+        options["apply_modifiers"] = apply_mods
+    elif file_format == 'ABC':
+        options["selected"] = True
+        options["start"] = settings.frame_start
+        options["end"] = settings.frame_end
+    elif file_format == 'USD':
+        options["selected_objects_only"] = True
+    elif file_format in ('SVG', 'PDF'):
+        options["selected_object_type"] = 'SELECTED'
+    elif file_format == 'OBJ':
+        options["export_selected_objects"] = True
+        options["apply_modifiers"] = apply_mods
+    elif file_format == 'PLY':
+        options["ascii_format"] = settings.ply_ascii
+        options["export_selected_objects"] = True
+        options["apply_modifiers"] = apply_mods
+    elif file_format == 'STL':
+        options["ascii_format"] = settings.stl_ascii
+        options["export_selected_objects"] = True
+        options["apply_modifiers"] = apply_mods
+    elif file_format == 'FBX':
+        options["use_selection"] = True
+        options["use_mesh_modifiers"] = apply_mods
+    elif file_format == 'glTF':
+        options["use_selection"] = True
+        options["export_apply"] = apply_mods
+
+    # Hand the objects over in a collection rather than selecting them, where every exporter takes one
+    if settings.keep_selection and all(
+            utils.has_operator_property(FORMATS[f][0], 'collection') for f in get_file_formats(settings)):
+        for option in SELECTION_OPTIONS:
+            if option in options:
+                options[option] = False
+        if "use_active_collection" in options:
+            options["use_active_collection"] = False
+        options["collection"] = EXPORT_COLLECTION_NAME
+    return operator, options
+
+
+# Finds all renderable objects and returns a set of them
+def get_renderable_objects(context):
+    """
+    Recursively collect renderable objects from scene collections.
+    Each collection is only visited once, even if it's linked in several places.
+
+    Returns:
+        set: The objects not hidden in render, in collections not hidden in render
+    """
+    profiling.current.count('get_renderable_objects')
+    renderable_objects = set()
+    visited = set()
+
+    def check_collection(collection):
+        # Skip if the entire collection is hidden in render, or was already checked
+        if collection.hide_render or collection in visited:
+            return
+        visited.add(collection)
+
+        # Check objects in this collection
+        for obj in collection.objects:
+            if not obj.hide_render:
+                renderable_objects.add(obj)
+
+        # Recursively check child collections
+        for child_collection in collection.children:
+            check_collection(child_collection)
+
+    # Start the recursive check from the scene's root collection
+    check_collection(context.scene.collection)
+
+    return renderable_objects
+
+
+# Get Objects to Export by Limit Settings
+# The limit is resolved into a set once, so every object is tested in a single pass
+def get_filtered_objects(context, settings):
+    profiling.current.count('get_filtered_objects')
+    objects = context.view_layer.objects.values()
+    object_types = settings.object_types
+
+    if settings.limit == 'VISIBLE':
+        def is_limited(obj):
+            return obj.visible_get()
+    elif settings.limit == 'SELECTED':
+        selection = set(context.selected_objects)
+        def is_limited(obj):
+            return obj in selection
+    elif settings.limit == 'RENDERABLE':
+        renderable = get_renderable_objects(context)
+        def is_limited(obj):
+            return obj in renderable and obj.visible_get()
+    else:
+        return objects
+
+    return [obj for obj in objects if obj.type in object_types and is_limited(obj)]
+
+
+def get_children_recursive(obj, settings):
+    children = []
+    for c in obj.children:
+        if obj.type in settings.object_types:
+            children.append(c)
+        children += get_children_recursive(c, settings)
+    return children
+
+
+def compile_plan(context, settings, base_dir):
+    """
+    Turns the batch export settings and the scene into the list of files to export,
+    without touching the scene or the file system.
+
+    Args:
+        context (bpy.types.Context): The context holding the scene and view layer to export.
+        settings (BatchExportSettings): The batch export settings to use.
+        base_dir (str): Absolute export directory, see get_base_dir.
+
+    Returns:
+        list: The ExportJob of every file to export, in export order.
+    """
+    with profiling.current.phase('index'):
+        index = utils.SceneIndex(context.scene)
+    operator, format_options = get_format_options(settings)
+    extra_format_options = [(file_format,) + get_format_options(settings, file_format)
+                            for file_format in get_file_formats(settings)[1:]]
+    lod_ratios = get_lod_ratios(settings)
+    jobs = []
+
+    def add_job(key, itemname, directory, objects):
+        # Change Itemname If Collection As Prefix
+        if settings.prefix_collection and 'OBJECT' in settings.mode:
+            collection = index.get_export_collection(objects[0])
+            if collection != index.scene_collection:
+                itemname = "_".join([collection.name, itemname])
+
+        name = settings.prefix + bpy.path.clean_name(itemname) + settings.suffix
+        options = dict(format_options)
+        filepath = os.path.join(directory, name) + get_export_extension(settings, options)
+        options["filepath"] = filepath
+        extra_formats = []
+        for file_format, extra_operator, extra_options in extra_format_options:
+            extra_options = dict(extra_options)
+            extra_filepath = os.path.join(directory, name) + get_export_extension(settings, extra_options, file_format)
+            extra_options["filepath"] = extra_filepath
+            extra_formats.append(ExtraFormat(file_format, extra_operator, extra_options, extra_filepath))
+        jobs.append(ExportJob(
+            key=key,
+            name=itemname,
+            directory=directory,
+            filepath=filepath,
+            objects=objects,
+            file_format=settings.file_format,
+            operator=operator,
+            options=options,
+            location=tuple(settings.location) if settings.set_location else None,
+            rotation=tuple(settings.rotation) if settings.set_rotation else None,
+            scale=tuple(settings.scale) if settings.set_scale else None,
+            lod_ratios=list(lod_ratios),
+            extra_formats=extra_formats,
+        ))
+
+    with profiling.current.phase('filter'):
+        filtered_objects = get_filtered_objects(context, settings)
+
+    ##### COLLECT JOBS BASED ON MODES #####
+
+    if settings.mode == 'OBJECTS':
+        for obj in filtered_objects:
+            add_job(obj.name, obj.name, base_dir, [obj])
+
+    elif settings.mode == 'PARENT_OBJECTS':
+        exportObjects = filtered_objects
+        exportSet = set(exportObjects)
+
+        for obj in exportObjects:
+            if obj.parent in exportSet:
+                continue  # if it has a parent, skip it for now, it'll be exported when we get to its parent
+
+            add_job(obj.name, obj.name, base_dir, [obj] + get_children_recursive(obj, settings))
+
+    elif settings.mode == 'COLLECTIONS':
+        exportobjects = set(filtered_objects)
+
+        for col in index.collections:
+            # Check if collection objects are in filtered objects
+            objects = [obj for obj in col.objects if obj in exportobjects]
+            if not objects:
+                continue
+
+            if settings.full_hierarchy:
+                hierarchy = index.get_hierarchy(col)
+                add_job(col.name, col.name, os.path.join(base_dir, os.path.dirname(hierarchy)), objects)
+            else:
+                add_job(col.name, col.name, base_dir, objects)
+
+    # Functionality for both COLLECTION_SUBDIRECTORIES and COLLECTION_SUBDIR_PARENTS
+    elif 'COLLECTION_SUBDIR' in settings.mode:
+        exportobjects = filtered_objects
+        exportSet = set(exportobjects)
+
+        for obj in exportobjects:
+            if 'PARENT' in settings.mode and obj.parent in exportSet:
+                continue  # if it has a parent, skip it for now, it'll be exported when we get to its parent
+
+            # Modify base_dir to add collection
+            collection = index.get_export_collection(obj)
+            if collection != index.scene_collection:
+                if settings.full_hierarchy:
+                    collection_dir = os.path.join(base_dir, index.get_hierarchy(collection))
+                else:
+                    collection_dir = os.path.join(base_dir, collection.name)
+            else: # If object is just in Scene Collection it get's exported to base_dir
+                collection_dir = base_dir
+
+            objects = [obj]
+            if 'PARENT' in settings.mode:
+                objects += get_children_recursive(obj, settings)
+            add_job(obj.name, obj.name, collection_dir, objects)
+
+    elif settings.mode == 'SCENE':
+        filename = ''
+        if not settings.prefix and not settings.suffix:
+            filename = bpy.path.basename(bpy.context.blend_data.filepath).split('.')[0]
+
+        objects = list(filtered_objects)
+        if objects:
+            add_job('SCENE', filename, base_dir, objects)
+
+    # Every job once per frame, frame by frame so each frame only has to be evaluated once
+    if uses_frame_sequence(settings):
+        jobs = [get_frame_job(job, frame)
+                for frame in range(settings.frame_start, settings.frame_end + 1) for job in jobs]
+
+    return jobs
+
+
+# Returns the distinct directories the jobs export to
+def get_directories(jobs):
+    return sorted({job.directory for job in jobs})
+
+
+# Returns a readable summary of the plan, one line per job
+def format_plan(jobs):
+    lines = []
+    file_count = 0
+    for job in jobs:
+        lines.append(f"{job.filepath}  ({len(job.objects)} object(s)"
+                     + (f", {len(job.lod_ratios)} LOD(s)" if job.lod_ratios else "") + ")")
+        for extra_format in job.extra_formats:
+            lines.append(f"{extra_format.filepath}  (same objects as {job.file_format})")
+        file_count += 1 + len(job.extra_formats)
+    lines.append(f"{file_count} file(s) in {len(get_directories(jobs))} directories")
+    return lines
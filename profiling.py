@@ -0,0 +1,113 @@
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Profile report written to the export directory
+PROFILE_NAME = ".batch_export_profile.json"
+
+
+class Profiler:
+    """
+    Times the phases of an export run, per job and for the whole run, and counts calls
+    to the expensive helpers. Phases nest, each phase's time includes its sub-phases.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.run_phases = defaultdict(float)  # phase: seconds over the whole run
+        self.counts = Counter()  # helper: number of calls
+        self.jobs = []  # Finished jobs with their phase times
+        self.current_job = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.run_phases[name] += elapsed
+            if self.current_job is not None:
+                phases = self.current_job["phases"]
+                phases[name] = phases.get(name, 0.0) + elapsed
+
+    def count(self, name):
+        self.counts[name] += 1
+
+    def begin_job(self, job):
+        self.current_job = {
+            "key": job.key,
+            "filepath": job.filepath,
+            "objects": len(job.objects),
+            "phases": {},
+            "start": time.perf_counter(),
+        }
+
+    def end_job(self):
+        if self.current_job is None:
+            return
+        self.current_job["seconds"] = time.perf_counter() - self.current_job.pop("start")
+        self.jobs.append(self.current_job)
+        self.current_job = None
+
+    # Adds the phases, counts and jobs of a worker's report, see get_report()
+    def merge(self, report):
+        for name, seconds in report["phases"].items():
+            self.run_phases[name] += seconds
+        self.counts.update(report["counts"])
+        self.jobs += report["jobs"]
+
+    def get_report(self, slowest=10):
+        return {
+            "seconds": time.perf_counter() - self.start,
+            "job_count": len(self.jobs),
+            "phases": dict(sorted(self.run_phases.items(), key=lambda item: -item[1])),
+            "counts": dict(self.counts.most_common()),
+            "slowest_jobs": sorted(self.jobs, key=lambda job: -job["seconds"])[:slowest],
+            "jobs": self.jobs,
+        }
+
+    def write(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.get_report(), file, indent=1)
+
+    # Short human-readable summary, one line per entry
+    def get_summary(self, slowest=5):
+        report = self.get_report(slowest)
+        lines = [f"Profile: {report['seconds']:.2f}s for {report['job_count']} job(s)"]
+        for name, seconds in report["phases"].items():
+            lines.append(f"  {name}: {seconds:.3f}s")
+        for name, count in report["counts"].items():
+            lines.append(f"  {name}: {count} call(s)")
+        for job in report["slowest_jobs"]:
+            lines.append(f"  slow: {job['key']} {job['seconds']:.3f}s")
+        return lines
+
+
+class NullProfiler:
+    """Stands in for Profiler when profiling is off, doing as little as possible."""
+    enabled = False
+    _null_phase = nullcontext()
+
+    def phase(self, name):
+        return self._null_phase
+
+    def count(self, name):
+        pass
+
+    def begin_job(self, job):
+        pass
+
+    def end_job(self):
+        pass
+
+    def merge(self, report):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+# Profiler of the running export, helpers outside of the operator report to it
+current = NULL_PROFILER
@@ -40,6 +40,22 @@ class BatchExportSettings(PropertyGroup):
         ],
         default="glTF",
     )
+    extra_formats: EnumProperty(
+        name="Also Export",
+        description="Other formats every file is also exported to, with the options and preset set for that format.\nModifiers are evaluated once for all formats",
+        items=[
+            ("DAE", "Collada", "", 1),
+            ("ABC", "Alembic", "", 2),
+            ("USD", "USD", "", 4),
+            ("OBJ", "OBJ", "", 8),
+            ("PLY", "PLY", "", 16),
+            ("STL", "STL", "", 32),
+            ("FBX", "FBX", "", 64),
+            ("glTF", "glTF", "", 128),
+        ],
+        options={'ENUM_FLAG'},
+        default=set(),
+    )
     mode: EnumProperty(
         name="Mode",
         description="What to export",
@@ -155,6 +171,10 @@ class BatchExportSettings(PropertyGroup):
         description="Should the modifiers by applied onto the exported mesh?\nCan't export Shape Keys with this on",
         default=True,
     )
+    frame_sequence: BoolProperty(
+        name="Frame Sequence", default=False,
+        description="Export every file once per frame from Frame Start to Frame End, with the frame number in the file name.\nFor OBJ, PLY, STL and glTF",
+    )
     frame_start: IntProperty(
         name="Frame Start",
         min=0,
@@ -227,6 +247,111 @@ class BatchExportSettings(PropertyGroup):
         description="Decimate factor for LOD 4",
         default=0.10, min=0.0, max=1.0, subtype="FACTOR"
     )
+    lod_cache: BoolProperty(
+        name="Cache LODs", default=True,
+        description="Keep decimated LOD meshes on disk and reuse them while the source mesh and ratios don't change",
+    )
+    lod_cache_size: IntProperty(
+        name="LOD Cache Size",
+        description="Size in MB the LOD cache is trimmed to after every export, removing the least recently used meshes",
+        default=512, min=1, subtype="UNSIGNED",
+    )
+
+    # Incremental Export:
+    incremental: BoolProperty(
+        name="Incremental", default=False,
+        description="Only export objects whose geometry, transforms or export settings changed since the last export.\nFingerprints are kept in a cache file in the export directory",
+    )
+
+    # Watch Mode:
+    watch: BoolProperty(
+        name="Watch", default=False,
+        description="Re-export the files of objects, meshes, materials and collections as they're changed, and remove the files of deleted or renamed ones.\nUses the cache file of Incremental export. Not for frame sequences",
+    )
+    watch_trigger: EnumProperty(
+        name="Watch Trigger",
+        description="When watch mode exports the changes",
+        items=(
+            ('SAVE', "On Save", "Export the changes when the .blend file is saved"),
+            ('DEBOUNCE', "After Delay", "Export the changes once nothing changed for the watch delay"),
+        ),
+        default='SAVE',
+    )
+    watch_delay: FloatProperty(
+        name="Watch Delay",
+        description="Seconds without changes before watch mode exports them",
+        default=2.0, min=0.1, soft_max=30.0, subtype='TIME', unit='TIME',
+    )
+
+    # Resume:
+    resume: BoolProperty(
+        name="Resume", default=False,
+        description="Continue the last export into this directory if it didn't finish, skipping the files it completed.\nEvery export keeps a journal of its .blend file in .batch_export_journal-*.jsonl until it finishes",
+    )
+
+    # Manifest:
+    manifest: BoolProperty(
+        name="Manifest", default=False,
+        description="Record every exported file with its source, format, size, content hash, triangle count and export time in .batch_export_manifest.sqlite in the export directory",
+    )
+
+    # Logging:
+    verbose: BoolProperty(
+        name="Verbose", default=False,
+        description="Print every exported file and message to the console as it happens.\nEvery export writes its events to .batch_export_log.jsonl in the export directory, the console otherwise only gets a summary",
+    )
+
+    # Profiling:
+    profile: BoolProperty(
+        name="Profile", default=False,
+        description="Time every phase of the export and write a report to .batch_export_profile.json in the export directory.\nA summary is shown in the Info editor",
+    )
+
+    # Fast Writers:
+    fast_writers: BoolProperty(
+        name="Fast Writer", default=False,
+        description="Write binary STL and PLY files directly from the mesh data instead of going through the exporter.\nPLY meshes with UVs, colors or other attributes still go through the exporter",
+    )
+
+    # Selection:
+    keep_selection: BoolProperty(
+        name="Keep Selection", default=False,
+        description="Hand each file's objects to the exporter in a temporary collection instead of selecting them, so the selection is never touched.\nOnly for exporters that take a collection (OBJ, PLY, STL, FBX, glTF, USD in Blender 4.2+), others still select the objects",
+    )
+
+    # Temporary Scene:
+    isolate: BoolProperty(
+        name="Temporary Scene", default=False,
+        description="Export linked duplicates of each file's objects from a temporary scene, where the transform overrides and LODs are applied, so the selection, transforms and evaluation of your scene are left alone.\nYour objects are only renamed while their duplicates are exported",
+    )
+
+    # Memory:
+    memory_budget: IntProperty(
+        name="Memory Budget",
+        description="Memory in MB this Blender process may use during an export. The export stops with an error before the next file once it's exceeded.\n0 for no limit",
+        default=0, min=0, subtype="UNSIGNED",
+    )
+
+    # Parallel Export:
+    use_parallel: BoolProperty(
+        name="Parallel Export", default=False,
+        description="Split the export into shards and run them in background Blender processes.\nWorkers read the saved .blend file, so save before exporting",
+    )
+    worker_count: IntProperty(
+        name="Workers",
+        description="How many background Blender processes to run at once",
+        default=4, min=1, soft_max=64,
+    )
+    shard_size: IntProperty(
+        name="Shard Size",
+        description="How many export jobs to hand to a worker at once",
+        default=50, min=1,
+    )
+    max_worker_memory: IntProperty(
+        name="Max Memory per Worker",
+        description="Memory in MB after which a worker hands its remaining jobs to a fresh process.\n0 for no limit",
+        default=0, min=0, subtype="UNSIGNED",
+    )
 
 registry = [
     BatchExportSettings,
@@ -1,5 +1,11 @@
 import bpy
+import ast
+import copy
 import os
+import sys
+import time
+from array import array
+from . import eventlog, profiling
 
 # A Dictionary of operator_name: [list of preset EnumProperty item tuples].
 # Blender's doc warns that not keeping reference to enum props array can
@@ -7,142 +13,316 @@ import os
 # Also useful for the get_preset_index function.
 preset_enum_items_refs = {}
 
+# Scanned presets per operator: {"directories": {directory: modification time},
+# "indices": {preset name: enum index}, "checked": time of the last change check}
+preset_registry = {}
+
+# Minimum time in seconds between checking preset directories for changes
+PRESET_CHECK_INTERVAL = 2.0
+
+# Returns the preset directories of an operator with their modification times
+def get_preset_directories(operator):
+    directories = {}
+    for d in bpy.utils.script_paths(subdir="presets/operator/" + operator):
+        try:
+            directories[d] = os.path.getmtime(d)
+        except OSError:
+            pass
+    return directories
+
+# Lists the presets of an operator and stores them in the registry.
+# The enum items list is only replaced when the presets actually changed,
+# so the EnumProperty keeps the same items between redraws.
+def scan_operator_presets(operator):
+    directories = get_preset_directories(operator)
+    names = set()
+    for d in directories:
+        for f in os.listdir(d):
+            if f.endswith(".py"):
+                names.add(os.path.splitext(f)[0])
+
+    presets = [('NO_PRESET', "(no preset)", "", 0)]
+    for name in sorted(names):
+        presets.append((name, name, ""))
+    if presets != preset_enum_items_refs.get(operator):
+        # Blender's doc warns that not keeping reference to enum props array can
+        # cause crashs and weird issues:
+        preset_enum_items_refs[operator] = presets
+    preset_registry[operator] = {
+        "directories": directories,
+        "indices": {preset[0]: index for index, preset in enumerate(presets)},
+        "checked": time.monotonic(),
+    }
+
+# Forgets every scanned preset, so they are listed again on the next redraw
+def refresh_operator_presets():
+    preset_registry.clear()
+    preset_cache.clear()
+
+# Rescans the presets of an operator if it was never scanned or if one of its preset
+# directories changed. Directories are checked at most every PRESET_CHECK_INTERVAL seconds.
+def update_operator_presets(operator):
+    entry = preset_registry.get(operator)
+    if entry is None:
+        scan_operator_presets(operator)
+        return
+    now = time.monotonic()
+    if now - entry["checked"] < PRESET_CHECK_INTERVAL:
+        return
+    entry["checked"] = now
+    if get_preset_directories(operator) != entry["directories"]:
+        scan_operator_presets(operator)
+
 # Returns a list of tuples used for an EnumProperty's items (identifier, name, description)
 # identifier, and name are the file name of the preset without the file extension (.py)
 def get_operator_presets(operator):
-    presets = [('NO_PRESET', "(no preset)", "", 0)]
+    update_operator_presets(operator)
+    return preset_enum_items_refs[operator]
+
+# Parsed preset files: (operator, preset): (file path, modification time, options)
+preset_cache = {}
+
+# Returns the path of the preset file, searching every script path, or None if it doesn't exist
+def find_operator_preset(operator, preset):
     for d in bpy.utils.script_paths(subdir="presets/operator/" + operator):
-        for f in os.listdir(d):
-            if not f.endswith(".py"):
+        fp = "".join([d, "/", preset, ".py"])
+        if os.path.isfile(fp):  # Found the preset file
+            return fp
+    return None
+
+# Reads the options of a preset file without running it. Only literal values
+# (numbers, strings, booleans, tuples, sets...) are read, anything else is skipped.
+def parse_operator_preset(fp):
+    options = {}
+    with open(fp, 'r') as file:
+        for line in file.readlines():
+            # This assumes formatting of these files remains exactly the same
+            if not line.startswith("op."):
                 continue
-            f = os.path.splitext(f)[0]
-            presets.append((f, f, ""))
-    # Blender's doc warns that not keeping reference to enum props array can
-    # cause crashs and weird issues:
-    preset_enum_items_refs[operator] = presets
-    return presets
+            line = line.removeprefix("op.")
+            split = line.split(" = ", 1)
+            if len(split) != 2:
+                continue
+            key = split[0].strip()
+            try:
+                options[key] = ast.literal_eval(split[1].strip())
+            except (ValueError, SyntaxError):
+                eventlog.current.warning(f"Skipping preset option {key} in {fp}, it isn't a literal value")
+    return options
 
 # Returns a dictionary of options from an operator's preset.
 # When calling an operator's method, you can use ** before a dictionary
 # in the method's arguments to set the arguments from that dictionary's
 # key: value pairs. Example:
 # bpy.ops.category.operator(**options)
+# Preset files are only parsed again when they change, callers get their own copy of the options.
 def load_operator_preset(operator, preset):
-    options = {}
     if preset == 'NO_PRESET':
-        return options
+        return {}
 
-    for d in bpy.utils.script_paths(subdir="presets/operator/" + operator):
-        fp = "".join([d, "/", preset, ".py"])
-        if os.path.isfile(fp):  # Found the preset file
-            print("Using preset " + fp)
-            file = open(fp, 'r')
-            for line in file.readlines():
-                # This assumes formatting of these files remains exactly the same
-                if line.startswith("op."):
-                    line = line.removeprefix("op.")
-                    split = line.split(" = ")
-                    key = split[0]
-                    value = split[1]
-                    options[key] = eval(value)
-            file.close()
-            return options
-    # If it didn't find the preset, use empty options
-    # (the preset option should look blank if the file doesn't exist anyway)
-    return options
+    cached = preset_cache.get((operator, preset))
+    try:
+        if cached and os.path.getmtime(cached[0]) == cached[1]:
+            return copy.deepcopy(cached[2])
+    except OSError:
+        pass  # The preset file was removed, look for it again
+
+    fp = find_operator_preset(operator, preset)
+    if not fp:
+        # If it didn't find the preset, use empty options
+        # (the preset option should look blank if the file doesn't exist anyway)
+        preset_cache.pop((operator, preset), None)
+        return {}
+
+    eventlog.current.info("Using preset " + fp, preset=fp)
+    profiling.current.count('parse_operator_preset')
+    preset_cache[(operator, preset)] = (fp, os.path.getmtime(fp), parse_operator_preset(fp))
+    return copy.deepcopy(preset_cache[(operator, preset)][2])
 
 # Finds the index of a preset with preset_name and returns it
 # Useful for transferring the value of a saved preset (in a StringProperty)
 # to the NOT saved EnumProperty for that preset used to present a nice GUI.
 def get_preset_index(operator, preset_name):
-    for p in range(len(preset_enum_items_refs[operator])):
-        if preset_enum_items_refs[operator][p][0] == preset_name:
-            return p
-    return 0
+    update_operator_presets(operator)
+    return preset_registry[operator]["indices"].get(preset_name, 0)
+
+
+# Checks whether an operator has a property, e.g. one that only newer Blender versions have
+def has_operator_property(operator, prop_name):
+    category, name = operator.split('.')
+    try:
+        rna_type = getattr(getattr(bpy.ops, category), name).get_rna_type()
+    except (AttributeError, KeyError):
+        return False
+    return prop_name in rna_type.properties
 
 
-def find_parent_collection(target_coll):
+# Returns how many ancestors of the object are in objects (a set), sorting by it
+# puts parents before their children
+def get_depth(obj, objects):
+    depth = 0
+    while obj.parent in objects:
+        obj = obj.parent
+        depth += 1
+    return depth
+
+
+class SceneIndex:
     """
-    Finds the immediate parent collection of a given collection within the scene.
-    
-    Args:
-        target_coll (bpy.types.Collection): The collection whose parent is to be found.
-        
-    Returns:
-        bpy.types.Collection or None: The parent collection, or None if no parent
-        is found (e.g., orphaned, or already the scene collection).
+    Lookups into a scene's collection tree, built once per export run so hierarchy
+    paths and the collections owning an object don't have to be searched for over
+    and over. Only collections linked into the scene are indexed.
+    A collection linked in several places is indexed at the first place it's found.
     """
-    # Check if target is a direct child of the scene collection
-    scene_collection = bpy.context.scene.collection
-    if target_coll in scene_collection.children.values():
-        return scene_collection
-    
-    # Check all other collections
-    for coll in bpy.data.collections:
-        if coll != target_coll and target_coll in coll.children.values():
-            return coll
-            
-    return None
 
+    def __init__(self, scene):
+        profiling.current.count('SceneIndex')
+        self.scene_collection = scene.collection
+        self.collections = []  # Collections in the scene, depth first, without the scene collection
+        self.parents = {}  # collection: parent collection
+        self.paths = {}  # collection: path of collection names from the scene collection down
+        self.object_collections = {}  # object: collections in the scene owning it
+
+        def index_collection(collection, path):
+            for obj in collection.objects:
+                self.object_collections.setdefault(obj, []).append(collection)
+            for child in collection.children:
+                if child in self.parents:
+                    continue
+                self.collections.append(child)
+                self.parents[child] = collection
+                self.paths[child] = os.path.join(path, child.name) if path else child.name
+                index_collection(child, self.paths[child])
+
+        index_collection(self.scene_collection, '')
+
+    def get_hierarchy(self, collection):
+        """Returns the path of collection names from the scene collection down to the collection."""
+        return self.paths.get(collection, collection.name)
+
+    def get_collections(self, obj):
+        """Returns the collections in the scene owning the object."""
+        return self.object_collections.get(obj, [])
 
-def get_collection_hierarchy(start_coll_name, top_level_coll_name="Scene Collection"):
+    def get_export_collection(self, obj):
+        """
+        Returns the collection an object is exported under: the first collection in the scene
+        owning it, or the scene collection if it isn't in any other collection.
+        """
+        for collection in self.get_collections(obj):
+            if collection != self.scene_collection:
+                return collection
+        return self.scene_collection
+
+
+def get_process_memory():
     """
-    Traces the hierarchy path from a start collection up to a specified top-level collection.
-    
-    Args:
-        start_coll_name (str): The name of the collection to start from.
-        top_level_coll_name (str, optional): The name of the target top-level collection.
-            Defaults to "Scene Collection".
-            
+    Gets the memory currently used by this process.
+
     Returns:
-        str or None: Path string showing the collection hierarchy, or None if path not found.
+        int: Resident memory in bytes. On platforms without a cheap way to read
+        the current usage (macOS), the peak usage is returned instead.
+    """
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return 0
+        return counters.WorkingSetSize
+
+    if os.path.isfile("/proc/self/statm"):
+        with open("/proc/self/statm", 'r') as file:
+            resident_pages = int(file.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class TransformSnapshot:
+    """
+    Location, rotation and scale of a list of objects, kept in one flat array.
+    Restores every object to exactly its own transform, however the selection or
+    the order of the objects changed in between.
     """
-    # Get the starting collection
-    start_coll = bpy.data.collections.get(start_coll_name)
-    if not start_coll:
-        print(f"Error: Start collection '{start_coll_name}' not found.")
-        return None
-    
-    # Get the top-level collection
-    top_level_coll = None
-    if top_level_coll_name == "Scene Collection":
-        if bpy.context and bpy.context.scene:
-            top_level_coll = bpy.context.scene.collection
+    STRIDE = 9  # Location, Euler rotation and scale
+
+    def __init__(self, objects):
+        self.objects = list(objects)
+        self.values = array('f')
+        for obj in self.objects:
+            self.values.extend(obj.location)
+            self.values.extend(obj.rotation_euler)
+            self.values.extend(obj.scale)
+
+    # Sets the given transforms (None to leave them as they are) on every object
+    def apply(self, location=None, rotation=None, scale=None):
+        for obj in self.objects:
+            if location is not None:
+                obj.location = location
+            if rotation is not None:
+                obj.rotation_euler = rotation
+            if scale is not None:
+                obj.scale = scale
+
+    def restore(self):
+        values = self.values
+        for index, obj in enumerate(self.objects):
+            offset = index * self.STRIDE
+            obj.location = values[offset:offset + 3]
+            obj.rotation_euler = values[offset + 3:offset + 6]
+            obj.scale = values[offset + 6:offset + 9]
+
+
+class TemporaryObjects:
+    """
+    Base of the helpers that swap temporary objects into an export, e.g. LODs and
+    baked stand-ins. The temporary objects live in a collection of their own and are
+    exported by selecting them, or by linking them into the export collection.
+    """
+
+    def __init__(self, context, collection_name, export_collection=None):
+        self.context = context
+        self.collection_name = collection_name
+        self.collection = None
+        self.export_collection = export_collection  # Holds the objects to export, if they aren't selected
+
+    def get_collection(self):
+        if self.collection is None:
+            self.collection = bpy.data.collections.new(self.collection_name)
+            self.context.scene.collection.children.link(self.collection)
+        return self.collection
+
+    def set_exported(self, obj, exported):
+        if self.export_collection is None:
+            obj.select_set(exported)
+        elif exported:
+            self.export_collection.objects.link(obj)
         else:
-            print("Error: Cannot access Scene Collection. No active scene context.")
-            return None
-    else:
-        top_level_coll = bpy.data.collections.get(top_level_coll_name)
-        if not top_level_coll:
-            print(f"Error: Top-level collection '{top_level_coll_name}' not found.")
-            return None
-    
-    print(f"Checking hierarchy for collection: '{start_coll.name}' up to '{top_level_coll_name}'")
-    
-    # Special case: start collection is the target top-level collection
-    if start_coll == top_level_coll:
-        print(f"'{start_coll.name}' is the specified top-level collection.")
-        return start_coll.name
-    
-    # Trace the path up the hierarchy
-    path = [start_coll.name]
-    current_coll = start_coll
-    
-    while current_coll != top_level_coll:
-        parent_coll = find_parent_collection(current_coll)
-        
-        if not parent_coll:
-            print(f"No parent found for '{current_coll.name}'. Hierarchy is incomplete.")
-            return None
-        
-        if parent_coll == top_level_coll:
-            hierarchy_path = os.path.join(*reversed(path))
-            print(f"Hierarchy path found: {hierarchy_path}")
-            return hierarchy_path
-        
-        path.append(parent_coll.name)
-            
-        current_coll = parent_coll
-    
-    # This should not be reached if logic is correct
-    return None
\ No newline at end of file
+            self.export_collection.objects.unlink(obj)
+
+    # Removes the collection, once the temporary objects in it are removed
+    def remove_collection(self):
+        if self.collection is not None:
+            bpy.data.collections.remove(self.collection)
+        self.collection = None
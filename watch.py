@@ -0,0 +1,144 @@
+import bpy
+import time
+from bpy.app.handlers import persistent
+from . import plan
+
+# Names of the datablocks changed since the last watch export
+changes = {
+    "objects": set(),
+    "data": set(),  # Meshes, curves and other object data
+    "materials": set(),
+    "collections": set(),
+}
+last_change = 0.0
+# Set while any batch export runs, the changes it makes to the scene aren't the user's
+exporting = False
+
+
+def has_changes():
+    return any(changes.values())
+
+
+# Returns the recorded changes and starts recording from scratch
+def pop_changes():
+    popped = {kind: set(names) for kind, names in changes.items()}
+    for names in changes.values():
+        names.clear()
+    return popped
+
+
+def is_touched(job, changes):
+    """
+    Checks whether a job exports anything in the recorded changes.
+
+    Args:
+        job (plan.ExportJob): The job to check.
+        changes (dict): The changes, as returned by pop_changes().
+    """
+    if job.source in changes["collections"]:
+        return True
+    for obj in job.objects:
+        if obj.name in changes["objects"]:
+            return True
+        if obj.data is not None and obj.data.name in changes["data"]:
+            return True
+        for slot in obj.material_slots:
+            if slot.material is not None and slot.material.name in changes["materials"]:
+                return True
+        for collection in obj.users_collection:
+            if collection.name in changes["collections"]:
+                return True
+    return False
+
+
+def get_settings():
+    scene = bpy.context.scene
+    return scene.batch_export if scene else None
+
+
+@persistent
+def record_changes(scene, depsgraph=None):
+    global last_change
+    if exporting or not scene.batch_export.watch or depsgraph is None:
+        return
+    for update in depsgraph.updates:
+        datablock = update.id.original
+        if isinstance(datablock, bpy.types.Object):
+            changes["objects"].add(datablock.name)
+        elif isinstance(datablock, bpy.types.Material):
+            changes["materials"].add(datablock.name)
+        elif isinstance(datablock, bpy.types.Collection):
+            changes["collections"].add(datablock.name)
+        elif not isinstance(datablock, (bpy.types.Scene, bpy.types.World)):
+            changes["data"].add(datablock.name)
+    if not has_changes():
+        return
+    last_change = time.monotonic()
+    if scene.batch_export.watch_trigger == 'DEBOUNCE' and not bpy.app.timers.is_registered(export_when_idle):
+        bpy.app.timers.register(export_when_idle, first_interval=scene.batch_export.watch_delay)
+
+
+# Timer waiting until nothing changed for the watch delay
+def export_when_idle():
+    settings = get_settings()
+    if settings is None or not settings.watch or settings.watch_trigger != 'DEBOUNCE':
+        return None
+    remaining = settings.watch_delay - (time.monotonic() - last_change)
+    if remaining > 0:
+        return remaining
+    if not export_changes():
+        return settings.watch_delay  # Try again later
+    return None
+
+
+@persistent
+def export_on_save(*args):
+    settings = get_settings()
+    if settings is not None and settings.watch and settings.watch_trigger == 'SAVE':
+        export_changes()
+
+
+def export_changes():
+    """
+    Re-exports the jobs touched by the recorded changes.
+
+    Returns:
+        bool: False if the export has to wait, e.g. while the user is in Edit Mode.
+    """
+    global exporting
+    if not has_changes():
+        return True
+    context = bpy.context
+    # Frame jobs aren't kept in the cache, so it couldn't tell which files are stale
+    if plan.uses_frame_sequence(context.scene.batch_export):
+        pop_changes()
+        return True
+    active = context.view_layer.objects.active if context.view_layer else None
+    if active is not None and active.mode != 'OBJECT':
+        return False
+
+    windows = context.window_manager.windows
+    exporting = True
+    try:
+        if windows:
+            with context.temp_override(window=windows[0]):
+                bpy.ops.export_mesh.batch(watch=True)
+        else:
+            bpy.ops.export_mesh.batch(watch=True)
+    finally:
+        exporting = False
+    return True
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(record_changes)
+    bpy.app.handlers.save_post.append(export_on_save)
+
+
+def unregister():
+    if record_changes in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(record_changes)
+    if export_on_save in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.remove(export_on_save)
+    if bpy.app.timers.is_registered(export_when_idle):
+        bpy.app.timers.unregister(export_when_idle)
@@ -0,0 +1,35 @@
+# Started by parallel.py inside a background Blender process:
+# blender --background file.blend --python worker.py -- shard.json
+# Exports the jobs listed in the shard spec with the settings saved in the .blend file.
+import bpy
+import addon_utils
+import json
+import sys
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:]
+    spec_path = argv[0]
+    with open(spec_path, 'r') as file:
+        spec = json.load(file)
+
+    # The add-on is usually enabled through the user preferences, but make sure
+    package = spec["package"]
+    if package not in bpy.context.preferences.addons:
+        addon_utils.enable(package, default_set=False)
+
+    # Plan in the scene and view layer the main process planned in, limits like
+    # Visible and Selected depend on the view layer
+    scene = bpy.data.scenes.get(spec["scene"] or "") or bpy.context.scene
+    view_layer = scene.view_layers.get(spec["view_layer"] or "") or scene.view_layers[0]
+    window = bpy.context.window
+    if window is not None:
+        # The context's selected objects follow the window's view layer
+        window.scene = scene
+        window.view_layer = view_layer
+    with bpy.context.temp_override(scene=scene, view_layer=view_layer):
+        bpy.ops.export_mesh.batch(shard=spec_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import bpy
+import numpy as np
+
+# Object types that can be turned into a mesh
+GEOMETRY_TYPES = {'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'}
+
+# Mesh attributes the PLY exporter doesn't write, or writes as the vertex positions and faces.
+# Any other attribute (UV maps, color attributes, custom attributes) makes it write more
+PLY_PLAIN_ATTRIBUTES = {'position', 'material_index', 'sharp_face', 'sharp_edge'}
+
+# Layout of a binary STL triangle: normal, 3 vertices and the attribute byte count
+STL_TRIANGLE = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attributes', '<u2')])
+
+
+def can_write(file_format, options):
+    """
+    Checks whether the fast writers can replace the exporter operator.
+    Only binary STL and PLY are written, with the exporters' default axes and scale.
+    PLY meshes with UVs, colors or other attributes are left to the exporter, the
+    writer raises ValueError for them.
+    """
+    if file_format not in ('STL', 'PLY') or options.get("ascii_format"):
+        return False
+    if file_format == 'PLY' and (options.get("export_normals") or options.get("export_triangulated_mesh")):
+        return False
+    return (options.get("global_scale", 1.0) == 1.0
+            and options.get("forward_axis", 'Y') == 'Y'
+            and options.get("up_axis", 'Z') == 'Z')
+
+
+def get_mesh_arrays(obj, depsgraph, apply_mods, plain=False):
+    """
+    Reads an object's geometry in world space.
+
+    Args:
+        obj (bpy.types.Object): The object to read.
+        depsgraph (bpy.types.Depsgraph): Evaluated depsgraph of the scene.
+        apply_mods (bool): Read the mesh with its modifiers applied.
+        plain (bool): Raise ValueError if the mesh has attributes besides PLY_PLAIN_ATTRIBUTES.
+
+    Returns:
+        tuple: Vertex positions (N x 3 float32), loop vertex indices, polygon loop
+        counts and triangle vertex indices (T x 3), or None if the object has no geometry.
+    """
+    evaluated = obj.evaluated_get(depsgraph)
+    source = evaluated if apply_mods else obj
+    mesh = source.to_mesh()
+    if mesh is None:
+        return None
+    try:
+        if plain:
+            extra = [attribute.name for attribute in mesh.attributes
+                     if not attribute.name.startswith('.') and attribute.name not in PLY_PLAIN_ATTRIBUTES]
+            if extra:
+                raise ValueError(f"{obj.name} has attributes the exporter writes: {', '.join(extra)}")
+        positions = np.empty(len(mesh.vertices) * 3, np.float32)
+        mesh.vertices.foreach_get('co', positions)
+        loops = np.empty(len(mesh.loops), np.int32)
+        mesh.loops.foreach_get('vertex_index', loops)
+        loop_totals = np.empty(len(mesh.polygons), np.int32)
+        mesh.polygons.foreach_get('loop_total', loop_totals)
+        mesh.calc_loop_triangles()
+        triangles = np.empty(len(mesh.loop_triangles) * 3, np.int32)
+        mesh.loop_triangles.foreach_get('vertices', triangles)
+    finally:
+        source.to_mesh_clear()
+
+    matrix = np.array(evaluated.matrix_world, np.float64)
+    positions = positions.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    triangles = triangles.reshape(-1, 3)
+    # Mirroring transforms turn the faces inside out, flip them back
+    if np.linalg.det(matrix[:3, :3]) < 0:
+        triangles = triangles[:, ::-1]
+        polygon_ends = np.cumsum(loop_totals)
+        firsts = np.repeat(polygon_ends - loop_totals, loop_totals)
+        lasts = np.repeat(polygon_ends - 1, loop_totals)
+        loops = loops[firsts + lasts - np.arange(len(loops))]
+    return positions.astype(np.float32), loops, loop_totals, triangles
+
+
+def get_objects_arrays(objects, apply_mods, plain=False):
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    arrays = []
+    for obj in objects:
+        if obj.type in GEOMETRY_TYPES:
+            mesh_arrays = get_mesh_arrays(obj, depsgraph, apply_mods, plain)
+            if mesh_arrays is not None:
+                arrays.append(mesh_arrays)
+    return arrays
+
+
+def write_stl(filepath, objects, apply_mods=True):
+    """Writes the objects' triangles to a binary STL file."""
+    arrays = get_objects_arrays(objects, apply_mods)
+    corners = [positions[triangles] for positions, loops, loop_totals, triangles in arrays]
+    corners = np.concatenate(corners) if corners else np.empty((0, 3, 3), np.float32)
+
+    records = np.zeros(len(corners), STL_TRIANGLE)
+    records['vertices'] = corners
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    records['normal'] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    with open(filepath, 'wb') as file:
+        file.write(b"Binary STL Writer".ljust(80, b" "))
+        file.write(np.uint32(len(records)).astype('<u4').tobytes())
+        file.write(records.tobytes())
+
+
+def write_ply(filepath, objects, apply_mods=True):
+    """
+    Writes the objects' vertices and polygons to a binary PLY file, laid out like the
+    exporter writes meshes without UVs, colors or other attributes.
+    """
+    arrays = get_objects_arrays(objects, apply_mods, plain=True)
+    positions = []
+    loops = []
+    loop_totals = []
+    offset = 0
+    for object_positions, object_loops, object_loop_totals, triangles in arrays:
+        positions.append(object_positions)
+        loops.append(object_loops + offset)
+        loop_totals.append(object_loop_totals)
+        offset += len(object_positions)
+    positions = np.concatenate(positions) if positions else np.empty((0, 3), np.float32)
+    loops = np.concatenate(loops) if loops else np.empty(0, np.int32)
+    loop_totals = np.concatenate(loop_totals) if loop_totals else np.empty(0, np.int32)
+    if len(loop_totals) and loop_totals.max() > 255:
+        raise ValueError("Polygons with more than 255 corners don't fit the PLY face list")
+
+    # Each face is its corner count as a uchar followed by the corner indices as uints
+    face_sizes = 1 + 4 * loop_totals
+    face_starts = np.cumsum(face_sizes) - face_sizes
+    faces = np.empty(int(face_sizes.sum()), np.uint8)
+    faces[face_starts] = loop_totals
+    loop_faces = np.repeat(np.arange(len(loop_totals)), loop_totals)
+    loop_corners = np.arange(len(loops)) - np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+    destinations = face_starts[loop_faces] + 1 + 4 * loop_corners
+    faces[destinations[:, None] + np.arange(4)] = loops.astype('<u4').view(np.uint8).reshape(-1, 4)
+
+    header = "\n".join([
+        "ply",
+        "format binary_little_endian 1.0",
+        f"comment Created in Blender version {bpy.app.version_string}",
+        f"element vertex {len(positions)}",
+        "property float x",
+        "property float y",
+        "property float z",
+        f"element face {len(loop_totals)}",
+        "property list uchar uint vertex_indices",
+        "end_header",
+    ]) + "\n"
+    with open(filepath, 'wb') as file:
+        file.write(header.encode('ascii'))
+        file.write(positions.astype('<f4').tobytes())
+        file.write(faces.tobytes())
+
+
+def write(file_format, options, objects):
+    """
+    Writes the objects with the fast writer of the format, see can_write().
+
+    Args:
+        file_format (str): 'STL' or 'PLY'.
+        options (dict): The exporter operator's arguments, including the filepath.
+        objects (list): The objects to export.
+    """
+    apply_mods = options.get("apply_modifiers", True)
+    if file_format == 'STL':
+        write_stl(options["filepath"], objects, apply_mods)
+    else:
+        write_ply(options["filepath"], objects, apply_mods)